@@ -14,6 +14,9 @@ class AuctionConfig(AppConfig):
     name = "auction"
 
     def ready(self):
+        from django.conf import settings
+
         from auction.scheduler import scheduler
 
-        scheduler.start()
+        if getattr(settings, "AUCTION_SCHEDULER_AUTOSTART", True):
+            scheduler.start()
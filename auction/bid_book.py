@@ -0,0 +1,73 @@
+"""
+In-process book of the running auctions used to reject invalid bids without a database round-trip.
+"""
+
+import threading
+
+from auction.helpers.validators import auction_validator
+
+
+class BidBookEntry:
+    """
+    Snapshot of the auction fields used by the bid validators.
+    """
+
+    def __init__(self, auction):
+        self.id = auction.id
+        self.initial_price = auction.initial_price
+        self.min_bid_price_gap = auction.min_bid_price_gap
+        self.started = auction.started
+        self.finished = auction.finished
+        self.active = auction.active
+        self.current_price = auction.current_price
+
+
+class BidBook:
+    """
+    Keeps a snapshot of every running auction this process has seen bids for.
+
+    Only auctions that are started, not finished and active are kept, and the rules (initial_price,
+    min_bid_price_gap) cannot change while an auction is running. The only field that may be stale is
+    current_price, which only grows, so a stale entry can let an invalid bid through to the database
+    (where it is rejected under the row lock), but it can never reject a valid one.
+    """
+
+    auction_validator = auction_validator
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, auction_id):
+        """
+        Returns the snapshot of a running auction.
+
+        :param auction_id: The ID of the auction.
+        :return: The BidBookEntry or None if the auction is not in the book.
+        """
+        return self._entries.get(int(auction_id))
+
+    def load(self, auction):
+        """
+        Stores the snapshot of the auction if it is running, otherwise removes it from the book.
+
+        :param auction: The Auction object as read from the database.
+        """
+        with self._lock:
+            if self.auction_validator.is_lasting(auction):
+                self._entries[auction.id] = BidBookEntry(auction)
+            else:
+                self._entries.pop(auction.id, None)
+
+    def discard(self, *auction_ids):
+        """
+        Removes auctions from the book, e.g. after they were finished, activated or deactivated.
+
+        :param auction_ids: The IDs of the auctions.
+        """
+        with self._lock:
+            for auction_id in auction_ids:
+                self._entries.pop(int(auction_id), None)
+
+
+bid_book = BidBook()
@@ -0,0 +1,107 @@
+"""
+Broadcasting of accepted bids to the WebSocket group of their auction.
+"""
+
+import asyncio
+import time
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from auction import protocol
+from charityAuctionProject.encoding import dumps
+
+# Bids of an auction accepted by this process within the window are sent as one frame, 0 sends every bid at once
+COALESCE_WINDOW = getattr(settings, "AUCTION_BROADCAST_COALESCE_MS", 0) / 1000
+
+
+def create_bid_event(bid, data):
+    """
+    Creates the send_new_bid group event of an accepted bid.
+
+    :param bid: The created bid object, as returned by AsyncAuctionService.make_bid.
+    :param data: The bid serialized by BidSerializer.
+    :return: The event dictionary.
+    """
+    event = {
+        "type": "send_new_bid",
+        "bid": dumps(data),
+        "bid_id": bid.id,
+        "previous_bid_id": bid.previous_bid_id,
+        "author_id": data["author"]["id"],
+    }
+    if protocol.is_available():
+        event["packed"] = protocol.pack_bid(data)
+    return event
+
+
+def create_batch_event(bid_events, bids):
+    """
+    Creates the send_new_bids group event of bids accepted within one coalescing window.
+
+    :param bid_events: The send_new_bid events of the bids, in the order they were accepted.
+    :param bids: The serialized bids in the same order, the last one is the leader.
+    :return: The event dictionary.
+    """
+    event = {
+        "type": "send_new_bids",
+        "events": bid_events,
+        "batch": dumps({"bids": bids, "leader": bids[-1]}),
+        "author_ids": list({bid["author"]["id"] for bid in bids}),
+    }
+    if protocol.is_available():
+        event["packed"] = protocol.pack_bids(bids)
+    return event
+
+
+class BidBroadcaster:
+    """
+    Sends accepted bids to the auction groups, optionally coalescing the bids of a short window into one event, so a
+    bidding war costs one channel layer message and one frame per subscriber per window instead of per bid.
+    """
+
+    def __init__(self, window=COALESCE_WINDOW):
+        """
+        :param window: The coalescing window in seconds, 0 disables coalescing.
+        """
+        self.window = window
+        self._pending = {}
+        self._tasks = set()
+
+    async def publish(self, group_name, bid, data):
+        """
+        Broadcasts an accepted bid, at once or at the end of the current window of its group.
+
+        :param group_name: The name of the auction group.
+        :param bid: The created bid object.
+        :param data: The bid serialized by BidSerializer.
+        """
+        event = create_bid_event(bid, data)
+        if self.window <= 0:
+            await self.send(group_name, event)
+            return
+
+        pending = self._pending.get(group_name)
+        if pending is None:
+            pending = self._pending[group_name] = []
+            task = asyncio.get_running_loop().create_task(self._flush_later(group_name))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        pending.append((event, data))
+
+    async def _flush_later(self, group_name):
+        await asyncio.sleep(self.window)
+        pending = self._pending.pop(group_name)
+        if len(pending) == 1:
+            event = pending[0][0]
+        else:
+            event = create_batch_event([event for event, _ in pending], [data for _, data in pending])
+        await self.send(group_name, event)
+
+    async def send(self, group_name, event):
+        # The consumers measure how long the event waited for them (see AuctionConsumer.is_superseded)
+        event["sent_at"] = time.time()
+        await get_channel_layer().group_send(group_name, event)
+
+
+bid_broadcaster = BidBroadcaster()
@@ -0,0 +1,182 @@
+"""
+Read-through cache of the serialized auction detail and list responses.
+
+Every auction has a version, the time of its last change, that is bumped whenever its serialized form changes (bid,
+edit, photo, start, finish, activation). A detail response is cached under the version read before it was built, so
+a response built while the auction changed is never served. A list page is cached with the versions of its auctions
+and the list generation, which is bumped whenever the set or the order of the matching auctions may change (create,
+edit, delete, start, finish, activation). A page is served only if all of them are still current, and it is not cached
+at all if one of its auctions changed while it was built.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from charityAuctionProject.metrics import registry
+
+AUCTION_CACHE_CONFIG = getattr(settings, "AUCTION_CACHE", {})
+
+DETAIL = "detail"
+LIST = "list"
+HIT = "hit"
+MISS = "miss"
+# Changes this close to the start of building a list page count as concurrent, to tolerate clock skew between hosts
+CHANGE_MARGIN_NS = 1_000_000_000
+
+REQUESTS_METRIC = "auction_cache_requests_total"
+registry.describe(REQUESTS_METRIC, "Auction detail and list cache lookups by result.")
+
+
+def hash_url(url):
+    # Only shortens the URL to a cache key
+    return hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+
+
+class AuctionCache:
+    """
+    Caches the serialized auction responses in a Django cache, so the backend is chosen in CACHES
+    (local memory, Redis, a dummy cache...).
+    """
+
+    def __init__(
+        self,
+        alias=AUCTION_CACHE_CONFIG.get("ALIAS", "default"),
+        timeout=AUCTION_CACHE_CONFIG.get("TIMEOUT", 300),
+        enabled=AUCTION_CACHE_CONFIG.get("ENABLED", True),
+    ):
+        """
+        :param alias: The alias of the Django cache.
+        :param timeout: Lifetime of the cached responses in seconds, it also bounds the staleness after changes made
+            outside the API (e.g. in the admin).
+        :param enabled: If False, nothing is cached.
+        """
+        self.alias = alias
+        self.timeout = timeout
+        self.enabled = enabled
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_detail(self, auction_id, url):
+        """
+        Returns the cached detail response of an auction.
+
+        :param auction_id: The ID of the auction.
+        :param url: The absolute URL of the request, the serialized photos contain absolute URLs.
+        :return: A tuple of the cached data (None on a miss) and the version to store a fresh response with.
+        """
+        if not self.enabled:
+            return None, None
+
+        version = self.get_version(auction_id)
+        data = self.cache.get(self.get_detail_key(auction_id, version, url))
+        registry.increment(REQUESTS_METRIC, kind=DETAIL, result=MISS if data is None else HIT)
+        return data, version
+
+    def set_detail(self, auction_id, version, url, data):
+        """
+        Caches the detail response of an auction built after get_detail returned the version.
+        """
+        if self.enabled:
+            self.cache.set(self.get_detail_key(auction_id, version, url), data, self.timeout)
+
+    def get_list(self, url):
+        """
+        Returns the cached list page of a request URL if none of its auctions changed.
+
+        :param url: The absolute URL of the request including the filter, ordering and pagination parameters.
+        :return: A tuple of the cached data (None on a miss) and the state to store a fresh page with.
+        """
+        if not self.enabled:
+            return None, None
+
+        started = time.time_ns()
+        generation = self.get_generation()
+        entry = self.cache.get(self.get_list_key(url))
+        data = None
+        if entry is not None and entry["generation"] == generation:
+            versions = self.cache.get_many([self.get_version_key(auction_id) for auction_id in entry["versions"]])
+            if all(
+                versions.get(self.get_version_key(auction_id)) == version
+                for auction_id, version in entry["versions"].items()
+            ):
+                data = entry["data"]
+        registry.increment(REQUESTS_METRIC, kind=LIST, result=MISS if data is None else HIT)
+        return data, (generation, started)
+
+    def set_list(self, url, state, auction_ids, data):
+        """
+        Caches a list page unless one of its auctions changed while it was built.
+
+        :param url: The absolute URL of the request.
+        :param state: The state returned by get_list before the page was built.
+        :param auction_ids: The IDs of the auctions of the page.
+        :param data: The response data.
+        """
+        if not self.enabled:
+            return
+        generation, started = state
+        keys = {auction_id: self.get_version_key(auction_id) for auction_id in auction_ids}
+        versions = self.cache.get_many(list(keys.values()))
+        if any(version > started - CHANGE_MARGIN_NS for version in versions.values()):
+            return
+        # Auctions without a version did not change since their version was evicted or they were created
+        entry = {
+            "generation": generation,
+            "versions": {
+                auction_id: versions[key] if key in versions else self.get_counter(key)
+                for auction_id, key in keys.items()
+            },
+            "data": data,
+        }
+        self.cache.set(self.get_list_key(url), entry, self.timeout)
+
+    def invalidate(self, *auction_ids, lists=False):
+        """
+        Invalidates the cached responses of auctions.
+
+        :param auction_ids: The IDs of the changed auctions.
+        :param lists: True if the change may add or remove auctions from list pages or reorder them.
+        """
+        if not self.enabled:
+            return
+        for auction_id in auction_ids:
+            self.bump(self.get_version_key(auction_id))
+        if lists:
+            self.bump(self.get_generation_key())
+
+    def get_version(self, auction_id):
+        return self.get_counter(self.get_version_key(auction_id))
+
+    def get_generation(self):
+        return self.get_counter(self.get_generation_key())
+
+    def get_counter(self, key):
+        # An evicted counter restarts from the current time, so it never comes back with an old value
+        value = self.cache.get(key)
+        if value is None:
+            self.cache.add(key, time.time_ns(), None)
+            value = self.cache.get(key)
+        return value
+
+    def bump(self, key):
+        self.cache.set(key, time.time_ns(), None)
+
+    def get_version_key(self, auction_id):
+        return f"auction:version:{auction_id}"
+
+    def get_generation_key(self):
+        return "auction:list:generation"
+
+    def get_detail_key(self, auction_id, version, url):
+        return f"auction:detail:{auction_id}:{version}:{hash_url(url)}"
+
+    def get_list_key(self, url):
+        return f"auction:list:{hash_url(url)}"
+
+
+auction_cache = AuctionCache()
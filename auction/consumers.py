@@ -1,22 +1,43 @@
-import json
+import time
 from json import JSONDecodeError
 from urllib.parse import parse_qs
 
-from asgiref.sync import sync_to_async
-from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.conf import settings
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import APIException, ParseError
 
-from auction.exceptions import WsAuthException
+from auction import protocol
+from auction.broadcast import bid_broadcaster
+from auction.exceptions import AuctionNotHasWinnerException, WsAuthException
 from auction.helpers.exceptions import api_exception_to_json
+from auction.helpers.pagination import CURSOR_PAGINATION, is_count_requested
 from auction.models import Auction
+from auction.replay import REPLAY_BUFFER_CONFIG, replay_buffer
 from auction.serializers import BidSerializer
 from auction.service import async_auction_service, async_user_service
 from authentication.service import auth_service
+from charityAuctionProject.encoding import dumps, loads
+from charityAuctionProject.metrics import WEBSOCKET, add_payload, measured, registry
 
 DEFAULT_LIMIT = settings.REST_FRAMEWORK.get("PAGE_SIZE", 10)
 AUCTION_GROUP_CLOSE_CODE = 3333
+MAX_RESUME_BIDS = REPLAY_BUFFER_CONFIG.get("MAX_RESUME_BIDS", 500)
+
+BACKPRESSURE_CONFIG = getattr(settings, "AUCTION_BACKPRESSURE", {})
+NO_BACKPRESSURE_POLICY = "none"
+LATEST_BID_POLICY = "latest"
+BACKPRESSURE_POLICY = BACKPRESSURE_CONFIG.get("POLICY", NO_BACKPRESSURE_POLICY)
+MAX_LAG = BACKPRESSURE_CONFIG.get("MAX_LAG_MS", 1000) / 1000
+
+SUBSCRIBERS_METRIC = "auction_group_subscribers"
+SENT_METRIC = "auction_group_messages_sent_total"
+DROPPED_METRIC = "auction_group_messages_dropped_total"
+GAPS_METRIC = "auction_group_message_gaps_total"
+AUCTION_COUNTER_METRICS = (SENT_METRIC, DROPPED_METRIC, GAPS_METRIC)
+registry.describe(SUBSCRIBERS_METRIC, "WebSocket connections subscribed to the auction group.", "gauge")
+registry.describe(SENT_METRIC, "Group messages sent to the WebSocket clients.")
+registry.describe(DROPPED_METRIC, "Bids skipped for lagging WebSocket clients by the backpressure policy.")
+registry.describe(GAPS_METRIC, "Bid sequence gaps seen by the consumers, e.g. messages dropped by a full channel layer")
 
 
 def get_group_name(auction_id):
@@ -27,31 +48,77 @@ class AuctionConsumer(AsyncWebsocketConsumer):
     auth_service = auth_service
     auction_service = async_auction_service
     user_service = async_user_service
+    replay_buffer = replay_buffer
+    broadcaster = bid_broadcaster
     auction_group_name = None
     auction_id = None
+    user = None
+    token_expires_at = None
+    use_msgpack = False
+    known_authors = None
+    last_bid_id = None
+    last_seen_bid_id = None
 
     async def connect(self):
         """
         Handles the WebSocket connection request.
+        Clients requesting the "auction.msgpack.v1" subprotocol get binary MessagePack frames (see auction.protocol).
+        Clients reconnecting with since_bid_id only get the bids they missed instead of the first page.
         """
+        subprotocols = self.scope.get("subprotocols", [])
+        self.use_msgpack = protocol.MSGPACK_SUBPROTOCOL in subprotocols and protocol.is_available()
+        self.known_authors = set()
         try:
             limit, offset, url, token = self.parse_parameters()
-            if not await self.user_service.get_user_by_token(token):
+            since_bid_id = self.parse_since_parameter()
+            self.user = await self.user_service.get_user_by_token(token)
+            if not self.user:
                 raise WsAuthException()
+            self.token_expires_at = self.auth_service.get_token_expiry(token)
 
-            await self.auction_service.get_valid_auction(self.auction_id)
+            # Join the group before reading the auction, so every bid placed after the read is delivered as an event
             self.auction_group_name = get_group_name(self.auction_id)
             await self.channel_layer.group_add(self.auction_group_name, self.channel_name)
-            await self.accept()
-            bids = await self.auction_service.get_bids(self.auction_id, limit, offset, url)
+            registry.increment(SUBSCRIBERS_METRIC, auction=self.auction_id)
+            auction = await self.auction_service.get_valid_auction(self.auction_id)
+            await self.accept(self.get_subprotocol())
+            if since_bid_id is not None:
+                await self.send_missed_bids(auction, since_bid_id)
+                return
+            pagination, cursor, with_count = self.parse_cursor_parameters()
+            if pagination == CURSOR_PAGINATION:
+                bids = await self.auction_service.get_bids_by_cursor(self.auction_id, limit, cursor, with_count, url)
+            else:
+                bids = await self.auction_service.get_bids(self.auction_id, limit, offset, url)
             higher_bids = await self.auction_service.get_users_highest_bids(self.auction_id)
             bids["highest_bids"] = higher_bids
-            await self.send(text_data=json.dumps(bids))
+            if self.use_msgpack:
+                await self.send(bytes_data=protocol.pack_page(bids, self.known_authors))
+            else:
+                await self.send(text_data=dumps(bids))
         except (APIException, Auction.DoesNotExist) as e:
-            await self.accept()
-            await self.send(text_data=api_exception_to_json(e))
+            await self.accept(self.get_subprotocol())
+            await self.send_error(e)
             await self.close()
 
+    @measured(WEBSOCKET, "connect")
+    async def websocket_connect(self, message):
+        await super().websocket_connect(message)
+
+    @measured(WEBSOCKET, "bid")
+    async def websocket_receive(self, message):
+        await super().websocket_receive(message)
+
+    async def send(self, text_data=None, bytes_data=None, close=False):
+        """
+        Sends a frame, adding its size to the payload of the measured operation.
+        """
+        add_payload(text_data if text_data is not None else bytes_data)
+        await super().send(text_data, bytes_data, close)
+
+    def get_subprotocol(self):
+        return protocol.MSGPACK_SUBPROTOCOL if self.use_msgpack else None
+
     def parse_parameters(self):
         """
         Parses the query parameters from the WebSocket URL.
@@ -64,6 +131,55 @@ class AuctionConsumer(AsyncWebsocketConsumer):
         url = f"ws:/{self.scope['path']}"
         return limit, offset, url, token
 
+    def parse_cursor_parameters(self):
+        """
+        Parses the keyset pagination parameters from the WebSocket URL.
+        """
+        query_params = parse_qs(self.scope['query_string'].decode())
+        pagination = query_params.get('pagination', [None])[0]
+        cursor = query_params.get('cursor', [None])[0]
+        with_count = is_count_requested(query_params.get('count', [None])[0])
+        return pagination, cursor, with_count
+
+    def parse_since_parameter(self):
+        """
+        Parses the ID of the last bid seen by a resuming client from the WebSocket URL.
+        """
+        query_params = parse_qs(self.scope['query_string'].decode())
+        since_bid_id = query_params.get('since_bid_id', [None])[0]
+        if since_bid_id is None:
+            return None
+        try:
+            return int(since_bid_id)
+        except ValueError:
+            raise ParseError("since_bid_id must be an integer.")
+
+    async def send_missed_bids(self, auction, since_bid_id):
+        """
+        Sends the bids placed after since_bid_id, taken from the replay buffer or, if it can not answer, from the
+        database. Clients that missed more than MAX_RESUME_BIDS bids get a resync message and should reconnect
+        without since_bid_id.
+        """
+        bids = self.replay_buffer.since(auction.id, since_bid_id, auction.leader_bid_id)
+        if bids is None:
+            bids = await self.auction_service.get_bids_since(auction.id, since_bid_id, MAX_RESUME_BIDS)
+            if bids is not None:
+                self.replay_buffer.seed(auction.id, since_bid_id, bids)
+
+        if bids is None:
+            if self.use_msgpack:
+                await self.send(bytes_data=protocol.pack_resync(since_bid_id))
+            else:
+                await self.send(text_data=dumps({"resync_required": True, "since_bid_id": since_bid_id}))
+            return
+
+        # Bids placed while the missed bids were read also arrive as group events and are skipped
+        self.last_bid_id = bids[-1]["id"] if bids else since_bid_id
+        if self.use_msgpack:
+            await self.send(bytes_data=protocol.pack_delta(since_bid_id, bids, self.known_authors))
+        else:
+            await self.send(text_data=dumps({"since_bid_id": since_bid_id, "results": bids}))
+
     def parse_token(self):
         query_params = parse_qs(self.scope['query_string'].decode())
         return query_params.get('token', [""])[0]
@@ -78,45 +194,141 @@ class AuctionConsumer(AsyncWebsocketConsumer):
             self.auction_group_name,
             self.channel_name,
         )
+        if registry.increment(SUBSCRIBERS_METRIC, -1, auction=self.auction_id) == 0:
+            # The last connection of the auction in this process is gone, e.g. after close_channel, so its counters
+            # are removed instead of being kept for every auction ever watched
+            registry.remove(AUCTION_COUNTER_METRICS, auction=self.auction_id)
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """
         Handles the incoming WebSocket message.
         """
         try:
-            token = self.parse_token()
-            author = await self.user_service.get_user_by_token(token)
+            author = await self.get_author()
             if not author:
                 raise WsAuthException()
-            data = json.loads(text_data)
+            data = self.decode_message(text_data, bytes_data)
             bid = await self.auction_service.make_bid(data, author, self.auction_id)
-            data = await sync_to_async(lambda: BidSerializer(bid).data)()
-            await self.channel_layer.group_send(
-                self.auction_group_name, {"type": "send_new_bid", "bid": json.dumps(data)}
-            )
+            await self.broadcaster.publish(self.auction_group_name, bid, BidSerializer(bid).data)
         except JSONDecodeError as e:
-            await self.send(text_data=json.dumps({"detail": e.msg}))
+            await self.send(text_data=dumps({"detail": e.msg}))
         except APIException as e:
-            await self.send(text_data=api_exception_to_json(e))
+            await self.send_error(e)
             if isinstance(e, WsAuthException):
                 await self.close()
 
-    async def close_channel(self, event):
+    def decode_message(self, text_data, bytes_data):
         """
-        Closes the WebSocket channel.
+        Decodes a JSON text frame or, for MessagePack connections, a binary frame.
         """
-        try:
-            winner = await self.auction_service.get_winner(self.auction_id)
-            winner = await database_sync_to_async(lambda: BidSerializer(winner).data)()
-            await self.send(text_data=json.dumps(winner))
-            await self.close(AUCTION_GROUP_CLOSE_CODE)
-        except APIException as e:
+        if bytes_data is not None and self.use_msgpack:
+            try:
+                return protocol.unpack(bytes_data)
+            except ValueError as e:
+                raise ParseError(str(e) or None)
+        return loads(text_data if text_data is not None else bytes_data)
+
+    async def send_error(self, e):
+        """
+        Sends an exception in the format of the connection.
+        """
+        if self.use_msgpack:
+            await self.send(bytes_data=protocol.pack_error(e))
+        else:
             await self.send(text_data=api_exception_to_json(e))
 
-    def send_new_bid(self, event):
+    def select_packed(self, packed, author_id):
+        """
+        Picks the prepacked frame variant without the author entry if the author was already sent on this connection.
+        """
+        without_author, with_author = packed
+        if author_id in self.known_authors:
+            return without_author
+        self.known_authors.add(author_id)
+        return with_author
+
+    async def get_author(self):
+        """
+        Returns the user resolved on connect. The token is checked again only once it has expired.
+        """
+        if self.user is None or self.token_expires_at is None or time.time() >= self.token_expires_at:
+            self.user = await self.user_service.get_user_by_token(self.parse_token())
+        return self.user
+
+    @measured(WEBSOCKET, "close")
+    async def close_channel(self, event):
         """
-        Sends a new bid to the WebSocket group.
+        Sends the winner bid serialized by the scheduler and closes the WebSocket channel.
         """
+        self.replay_buffer.discard(self.auction_id)
+        registry.increment(SENT_METRIC, auction=self.auction_id)
+        winner = event.get("winner")
+        if winner is None:
+            await self.send_error(AuctionNotHasWinnerException())
+        elif self.use_msgpack and event.get("winner_packed"):
+            await self.send(bytes_data=self.select_packed(event["winner_packed"], event["winner_author_id"]))
+        else:
+            await self.send(text_data=winner)
+        await self.close(AUCTION_GROUP_CLOSE_CODE)
+
+    def record_bid(self, event):
+        """
+        Appends the bid of a group event to the replay buffer and counts the gaps in the bid sequence of the connection.
+        Events of different processes may arrive out of order, so a gap is not always a lost message.
+        """
+        if not self.replay_buffer.has(self.auction_id, event["bid_id"]):
+            self.replay_buffer.append(self.auction_id, event["previous_bid_id"], loads(event["bid"]))
+        previous_bid_id = event["previous_bid_id"]
+        last_seen_bid_id = self.last_seen_bid_id
+        if last_seen_bid_id is not None and previous_bid_id is not None and previous_bid_id > last_seen_bid_id:
+            registry.increment(GAPS_METRIC, auction=self.auction_id)
+        self.last_seen_bid_id = max(self.last_seen_bid_id or 0, event["bid_id"])
+
+    def is_superseded(self, event, bid_id):
+        """
+        Applies the backpressure policy. With LATEST_BID_POLICY a bid that waited longer than MAX_LAG for this consumer
+        is skipped if a newer bid of the auction was already broadcast, as the consumer is going to send that one next.
+        Newer bids are known from the replay buffer, so the policy needs AUCTION_REPLAY_BUFFER["SIZE"] > 0.
+        """
+        if BACKPRESSURE_POLICY != LATEST_BID_POLICY or time.time() - event.get("sent_at", time.time()) <= MAX_LAG:
+            return False
+        last_id = self.replay_buffer.get_last_id(self.auction_id)
+        return last_id is not None and last_id > bid_id
+
+    async def send_new_bid(self, event):
+        """
+        Sends a new bid to the WebSocket group and records it in the replay buffer.
+        """
+        self.record_bid(event)
+        if self.last_bid_id is not None and event["bid_id"] <= self.last_bid_id:
+            return
+        if self.is_superseded(event, event["bid_id"]):
+            registry.increment(DROPPED_METRIC, auction=self.auction_id)
+            return
+        registry.increment(SENT_METRIC, auction=self.auction_id)
+        if self.use_msgpack and event.get("packed"):
+            await self.send(bytes_data=self.select_packed(event["packed"], event["author_id"]))
+            return
         bid = event["bid"]
-        return self.send(text_data=bid)
+        await self.send(text_data=bid)
 
+    async def send_new_bids(self, event):
+        """
+        Sends the bids of a coalescing window as one frame and records them in the replay buffer.
+        """
+        for bid_event in event["events"]:
+            self.record_bid(bid_event)
+        if self.last_bid_id is not None and event["events"][0]["bid_id"] <= self.last_bid_id:
+            # Some of the bids were already sent when the connection resumed
+            for bid_event in event["events"]:
+                await self.send_new_bid(bid_event)
+            return
+        if self.is_superseded(event, event["events"][-1]["bid_id"]):
+            registry.increment(DROPPED_METRIC, len(event["events"]), auction=self.auction_id)
+            return
+        registry.increment(SENT_METRIC, auction=self.auction_id)
+        if self.use_msgpack and event.get("packed"):
+            self.known_authors.update(event["author_ids"])
+            await self.send(bytes_data=event["packed"])
+            return
+        await self.send(text_data=event["batch"])
@@ -1,43 +1,101 @@
-from django_filters.rest_framework import FilterSet
+from django.conf import settings
+from django.db.models import DateTimeField, Func
+from django.db.models.functions import Extract
+from django_filters.constants import EMPTY_VALUES
+from django_filters.rest_framework import DateTimeFromToRangeFilter, FilterSet, NumberFilter
+from rest_framework.filters import SearchFilter
 
 from .models import Auction
+from .search import search_auctions
+
+
+class LocalDateTime(Func):
+    """
+    The wall-clock time of a datetime column in TIME_ZONE, which is the time stored by Django (USE_TZ = False).
+
+    PostgreSQL stores the datetimes as timestamptz, where EXTRACT depends on the session time zone and can not be
+    indexed. Extracting from the column AT TIME ZONE gives the same parts, and the expression is immutable, so the
+    date part filters are served by the expression indexes of migration 0015. Other databases store the wall-clock
+    time as is.
+    """
+
+    output_field = DateTimeField()
+
+    def __init__(self, expression, zone=settings.TIME_ZONE):
+        super().__init__(expression)
+        self.zone = zone
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return compiler.compile(self.source_expressions[0])
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        return f"({sql} AT TIME ZONE %s)", (*params, self.zone)
+
+
+class DatePartFilter(NumberFilter):
+    """
+    Compares a part (month, day, hour or minute) of a datetime field, e.g. ?start_time__hour__gt=20.
+    """
+
+    def __init__(self, field_name, part, lookup_expr, **kwargs):
+        super().__init__(field_name=field_name, lookup_expr=lookup_expr, **kwargs)
+        self.part = part
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        # Has to stay the expression of the auction_<field>_<part>_idx indexes to use them
+        alias = f"{self.field_name}_{self.part}"
+        part = Extract(LocalDateTime(self.field_name), self.part)
+        return qs.alias(**{alias: part}).filter(**{f"{alias}__{self.lookup_expr}": value})
 
 
 class AuctionFilter(FilterSet):
+    # ?start_time_range_after=...&start_time_range_before=..., both bounds are optional and inclusive
+    start_time_range = DateTimeFromToRangeFilter(field_name="start_time")
+    end_time_range = DateTimeFromToRangeFilter(field_name="end_time")
+
+    start_time__month__lt = DatePartFilter("start_time", "month", "lt")
+    start_time__day__lt = DatePartFilter("start_time", "day", "lt")
+    start_time__hour__lt = DatePartFilter("start_time", "hour", "lt")
+    start_time__minute__lt = DatePartFilter("start_time", "minute", "lt")
+    start_time__month__gt = DatePartFilter("start_time", "month", "gt")
+    start_time__day__gt = DatePartFilter("start_time", "day", "gt")
+    start_time__hour__gt = DatePartFilter("start_time", "hour", "gt")
+    start_time__minute__gt = DatePartFilter("start_time", "minute", "gt")
+    end_time__month__lt = DatePartFilter("end_time", "month", "lt")
+    end_time__day__lt = DatePartFilter("end_time", "day", "lt")
+    end_time__hour__lt = DatePartFilter("end_time", "hour", "lt")
+    end_time__minute__lt = DatePartFilter("end_time", "minute", "lt")
+    end_time__month__gt = DatePartFilter("end_time", "month", "gt")
+    end_time__day__gt = DatePartFilter("end_time", "day", "gt")
+    end_time__hour__gt = DatePartFilter("end_time", "hour", "gt")
+    end_time__minute__gt = DatePartFilter("end_time", "minute", "gt")
+
     class Meta:
         model = Auction
         fields = {
             "title": ["icontains"],
             "initial_price": ["exact", "lt", "gt"],
             "min_bid_price_gap": ["exact", "lt", "gt"],
-            "start_time": [
-                "exact",
-                "lt",
-                "gt",
-                "year__lt",
-                "month__lt",
-                "day__lt",
-                "hour__lt",
-                "minute__lt",
-                "year__gt",
-                "month__gt",
-                "day__gt",
-                "hour__gt",
-                "minute__gt",
-            ],
-            "end_time": [
-                "exact",
-                "lt",
-                "gt",
-                "year__lt",
-                "month__lt",
-                "day__lt",
-                "hour__lt",
-                "minute__lt",
-                "year__gt",
-                "month__gt",
-                "day__gt",
-                "hour__gt",
-                "minute__gt",
-            ],
+            # Year lookups compile to ranges served by the start_time and end_time indexes, the other date parts are
+            # the DatePartFilters above
+            "start_time": ["exact", "lt", "gt", "year__lt", "year__gt"],
+            "end_time": ["exact", "lt", "gt", "year__lt", "year__gt"],
         }
+
+
+class AuctionSearchFilter(SearchFilter):
+    """
+    Full-text search of the auctions by title and description through the search query parameter, ordered by relevance
+    unless an ordering is requested (see auction.search).
+    """
+
+    search_description = "Words of the auction title or description, the best matches come first."
+
+    def filter_queryset(self, request, queryset, view):
+        text = " ".join(self.get_search_terms(request))
+        if not text:
+            return queryset
+        return search_auctions(queryset, text)
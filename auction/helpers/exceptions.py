@@ -1,5 +1,6 @@
 from rest_framework.exceptions import APIException
-from rich import json
+
+from charityAuctionProject.encoding import dumps
 
 
 def api_exception_to_json(e):
@@ -16,4 +17,4 @@ def api_exception_to_json(e):
     else:
         error = {"detail": e.__str__()}
 
-    return json.dumps(error)
+    return dumps(error)
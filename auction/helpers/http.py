@@ -0,0 +1,38 @@
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def create_etag(request, *parts):
+    """
+    Creates a strong ETag from version markers of a resource.
+    :param request: The DRF request, the accepted renderer format is part of the ETag as every format is a different
+        representation.
+    :param parts: The values identifying the version of the resource, e.g. its ID and update time.
+    :return: The quoted ETag.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    return '"%s"' % "-".join(str(part) for part in (getattr(renderer, "format", ""), *parts))
+
+
+def get_not_modified_response(request, etag):
+    """
+    Answers a conditional GET or HEAD request whose If-None-Match validator still matches.
+    If-Modified-Since is not evaluated, as Last-Modified has a one second resolution and bids change more often.
+    :param request: The request.
+    :param etag: The current ETag of the resource.
+    :return: A 304 Not Modified response or None if the full response has to be sent.
+    """
+    return get_conditional_response(request, etag=etag)
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Adds the ETag and Last-Modified headers to a response.
+    :param response: The response.
+    :param etag: The current ETag of the resource.
+    :param last_modified: The last modification time of the resource as a datetime.
+    :return: The same response.
+    """
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
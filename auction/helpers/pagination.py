@@ -1,3 +1,14 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+CURSOR_PAGINATION = "cursor"
+INVALID_CURSOR_MESSAGE = "Invalid cursor"
+
+
 def create_paginated_dict(paginator, page_obj, objects, limit, base_url):
     """
     Converts paginated data into a dictionary suitable for JSON serialization.
@@ -18,3 +29,94 @@ def create_paginated_dict(paginator, page_obj, objects, limit, base_url):
         'previous': prev_url,
         'results': objects,
     }
+
+
+def encode_cursor(bid, reverse=False):
+    """
+    Creates an opaque cursor pointing at the position of a bid in the (created, id) order.
+
+    :param bid: The Bid object at the edge of the current page.
+    :param reverse: True if the cursor points to the previous page.
+    :return: The cursor as URL-safe string.
+    """
+
+    position = json.dumps([bid.created.isoformat(), bid.id, reverse])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor created by encode_cursor.
+
+    :param cursor: The cursor string.
+    :return: A tuple of the created time, the ID and the direction flag.
+    :raises NotFound: If the cursor is malformed.
+    """
+
+    try:
+        created, bid_id, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created), int(bid_id), bool(reverse)
+    except (TypeError, ValueError):
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+
+
+def paginate_by_cursor(queryset, limit, cursor=None):
+    """
+    Returns one page of bids, newest first, using a keyset on (created, id) instead of OFFSET.
+
+    :param queryset: The queryset of bids to paginate.
+    :param limit: The limit of objects per page.
+    :param cursor: The cursor of the requested page or None for the first page.
+    :return: A tuple of the page objects, the next cursor and the previous cursor.
+    """
+
+    if cursor is None:
+        bids = list(queryset.order_by("-created", "-id")[: limit + 1])
+        has_next, has_previous = len(bids) > limit, False
+    else:
+        created, bid_id, reverse = decode_cursor(cursor)
+        if reverse:
+            newer = Q(created__gt=created) | Q(created=created, id__gt=bid_id)
+            bids = list(queryset.filter(newer).order_by("created", "id")[: limit + 1])
+            has_next, has_previous = True, len(bids) > limit
+            bids = bids[:limit][::-1]
+        else:
+            older = Q(created__lt=created) | Q(created=created, id__lt=bid_id)
+            bids = list(queryset.filter(older).order_by("-created", "-id")[: limit + 1])
+            has_next, has_previous = len(bids) > limit, True
+
+    bids = bids[:limit]
+    next_cursor = encode_cursor(bids[-1]) if has_next and bids else None
+    previous_cursor = encode_cursor(bids[0], reverse=True) if has_previous and bids else None
+    return bids, next_cursor, previous_cursor
+
+
+def create_cursor_paginated_dict(objects, next_cursor, previous_cursor, count, cursor_to_url):
+    """
+    Converts cursor paginated data into a dictionary suitable for JSON serialization.
+
+    :param objects: The paginated objects to include in the results.
+    :param next_cursor: The cursor of the next page or None.
+    :param previous_cursor: The cursor of the previous page or None.
+    :param count: The total number of objects or None if counting was skipped.
+    :param cursor_to_url: Function building the page URL from a cursor.
+    :return: A dictionary representing the paginated data.
+    """
+
+    return {
+        'count': count,
+        'next': cursor_to_url(next_cursor) if next_cursor else None,
+        'previous': cursor_to_url(previous_cursor) if previous_cursor else None,
+        'results': objects,
+    }
+
+
+def is_count_requested(value):
+    """
+    Parses the "count" query parameter, which allows skipping the COUNT(*) query of a page.
+
+    :param value: The raw parameter value or None.
+    :return: False if the count should be skipped, True otherwise.
+    """
+
+    return str(value).lower() not in ("0", "false")
@@ -0,0 +1,250 @@
+"""
+Benchmarks of single hot paths, measured in-process against the configured database. Unlike the load test they time
+one operation at a time, e.g.:
+
+    python manage.py benchmark bid --rounds 1000 --concurrency 20
+    python manage.py benchmark highest-bids --bids 100000 --bidders 5000
+    python manage.py benchmark auth --rounds 5000
+    python manage.py benchmark encoding --items 100
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auction.management.commands.loadtest import LOADTEST_USER_PREFIX, QueryCounter, percentile
+from auction.models import Auction, Bid
+from auction.serializers import AuctionSerializer, BidSerializer
+from auction.service import async_auction_service
+from auction.statistics import statistics_service
+from auction.views import AuctionViewSet
+from authentication.authentication import CachedJWTAuthentication
+from authentication.service import AuthService
+from charityAuctionProject import encoding
+
+# The benchmarks and their default number of measured runs
+BENCHMARKS = {"bid": 500, "highest-bids": 20, "auth": 1000, "encoding": 200}
+BULK_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a benchmark of a single hot path and reports its p50/p99 time and the database queries per operation. "
+        "bid: make_bid on a running auction, one bid at a time and from concurrent bidders. "
+        "highest-bids: the highest bid of every user of an auction, loaded on every WebSocket connect. "
+        "auth: the authentication of a request with the user loaded from the database and built from the token claims. "
+        "encoding: the JSON encoding of bid and auction list payloads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("benchmark", choices=BENCHMARKS, help="The benchmark to run.")
+        parser.add_argument("--rounds", type=int, help="Measured runs of the benchmarked operation.")
+        parser.add_argument("--concurrency", type=int, default=20, help="bid: users bidding concurrently.")
+        parser.add_argument("--bids", type=int, default=100_000, help="highest-bids: bids of the auction.")
+        parser.add_argument("--bidders", type=int, default=5000, help="highest-bids: users bidding in the auction.")
+        parser.add_argument("--items", type=int, default=100, help="encoding: bids and auctions in the payloads.")
+        parser.add_argument("--keep", action="store_true", help="Keep the created users, auctions and bids.")
+
+    def handle(self, *args, **options):
+        users = []
+        auctions = []
+        options["rounds"] = options["rounds"] or BENCHMARKS[options["benchmark"]]
+        counter = QueryCounter()
+        counter.install()
+        try:
+            getattr(self, "benchmark_" + options["benchmark"].replace("-", "_"))(users, auctions, counter, options)
+        finally:
+            counter.uninstall()
+            if not options["keep"]:
+                Auction.objects.filter(pk__in=[auction.pk for auction in auctions]).delete()
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def benchmark_bid(self, users, auctions, counter, options):
+        """
+        Times make_bid on a running auction, first one bid at a time, then with concurrent bidders whose bids queue for
+        the database thread like the bids of concurrent WebSocket clients.
+        """
+        users.extend(self.create_users(options["concurrency"]))
+        auction = self.create_auction(users[0])
+        auctions.append(auction)
+        prices = itertools.count(auction.initial_price + auction.min_bid_price_gap, auction.min_bid_price_gap)
+
+        async def place_bids(author, bids, timings, rejected):
+            for _ in range(bids):
+                started = time.perf_counter()
+                try:
+                    await async_auction_service.make_bid({"price": next(prices)}, author, auction.id)
+                except APIException:
+                    # A concurrent bidder got a higher price accepted first
+                    rejected.append(time.perf_counter() - started)
+                    continue
+                timings.append(time.perf_counter() - started)
+
+        async def run(bidders):
+            timings = []
+            rejected = []
+            bids = max(options["rounds"] // len(bidders), 1)
+            await place_bids(bidders[0], 1, [], [])
+            counter.reset()
+            await asyncio.gather(*(place_bids(bidder, bids, timings, rejected) for bidder in bidders))
+            self.report(f"make_bid ({len(bidders)} bidders)", timings, counter.count / (len(timings) + len(rejected)))
+            if rejected:
+                self.stdout.write(f"Rejected {len(rejected)} bids outbid by a concurrent bidder")
+
+        asyncio.run(run(users[:1]))
+        asyncio.run(run(users))
+
+    def benchmark_highest_bids(self, users, auctions, counter, options):
+        """
+        Times get_users_highest_bids on an auction whose bids are spread randomly over the bidders.
+        """
+        users.extend(self.create_users(options["bidders"]))
+        auction = self.create_auction(users[0])
+        auctions.append(auction)
+        authors = random.Random(0).choices(users, k=options["bids"])
+        Bid.objects.bulk_create(
+            (
+                Bid(auction=auction, author=author, price=auction.initial_price + number, leader=False)
+                for number, author in enumerate(authors, start=1)
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+        get_users_highest_bids = async_to_sync(async_auction_service.get_users_highest_bids)
+        bids = self.measure(
+            f"get_users_highest_bids ({options['bids']} bids, {options['bidders']} bidders)",
+            lambda: get_users_highest_bids(auction.id),
+            counter,
+            options["rounds"],
+        )
+        self.stdout.write(f"Returned {len(bids)} bids")
+
+    def benchmark_auth(self, users, auctions, counter, options):
+        """
+        Times the REST authentication of a request in both token modes, for the first request with a token and for the
+        following ones served by the token cache.
+        """
+        users.extend(self.create_users(1))
+        user = users[0]
+        for stateless_tokens in (False, True):
+            auth_service = AuthService(stateless_tokens=stateless_tokens)
+            authentication = CachedJWTAuthentication()
+            authentication.auth_service = auth_service
+            token = auth_service.add_user_claims(AccessToken.for_user(user), user)
+            request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+            def authenticate_first():
+                auth_service.user_cache.clear()
+                return authentication.authenticate(request)
+
+            mode = "stateless" if stateless_tokens else "database"
+            self.measure(f"Authentication ({mode}, first request)", authenticate_first, counter, options["rounds"])
+            self.measure(
+                f"Authentication ({mode}, cached token)",
+                lambda: authentication.authenticate(request),
+                counter,
+                options["rounds"],
+            )
+
+    def benchmark_encoding(self, users, auctions, counter, options):
+        """
+        Times the encoding of a bid list and an auction list, serialized like the WebSocket and REST responses, with
+        the project-wide encoding and with the encoders it replaced.
+        """
+        users.extend(self.create_users(1))
+        bid_ids = []
+        for _ in range(options["items"]):
+            auction = self.create_auction(users[0])
+            auctions.append(auction)
+            bid = Bid.objects.create(auction=auction, author=users[0], price=auction.initial_price + 1)
+            Auction.objects.filter(pk=auction.pk).update(current_price=bid.price, leader_bid=bid)
+            bid_ids.append(bid.pk)
+
+        payloads = {
+            "bid list": BidSerializer(Bid.objects.filter(pk__in=bid_ids).select_related("author"), many=True).data,
+            "auction list": AuctionSerializer(
+                AuctionViewSet.queryset.filter(pk__in=[auction.pk for auction in auctions]), many=True
+            ).data,
+        }
+        encoders = {
+            "encoding.dumps_bytes": encoding.dumps_bytes,
+            "DRF JSONRenderer": JSONRenderer().render,
+            "json.dumps": lambda data: json.dumps(data, cls=JSONEncoder).encode(),
+        }
+        for payload_name, payload in payloads.items():
+            for encoder_name, encode in encoders.items():
+                self.measure(
+                    f"{encoder_name}, {payload_name} of {len(payload)}",
+                    lambda: encode(payload),
+                    counter,
+                    options["rounds"],
+                    items=len(payload),
+                )
+
+    def create_users(self, count):
+        suffix = int(time.time() * 1000)
+        # Unusable passwords are not hashed, which keeps the creation of thousands of users fast
+        password = make_password(None)
+        return User.objects.bulk_create(
+            (User(username=f"{LOADTEST_USER_PREFIX}{suffix}_{number}", password=password) for number in range(count)),
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+    def create_auction(self, author):
+        now = timezone.now()
+        # Created as started, so it is added to the running statistics here instead of by the lifecycle engine
+        statistics_service.record_started_auctions(1)
+        return Auction.objects.create(
+            title="Benchmark",
+            description="Created by the benchmark command",
+            initial_price=1,
+            min_bid_price_gap=1,
+            author=author,
+            started=True,
+            start_time=now - timedelta(minutes=1),
+            end_time=now + timedelta(hours=1),
+        )
+
+    def measure(self, name, operation, counter, rounds, items=None):
+        """
+        Runs an operation once to warm up, then the given number of rounds, and reports its times and queries.
+        :param items: The number of items an operation processes, to report its throughput.
+        :return: The result of the last run.
+        """
+        result = operation()
+        timings = []
+        counter.reset()
+        for _ in range(rounds):
+            started = time.perf_counter()
+            result = operation()
+            timings.append(time.perf_counter() - started)
+        self.report(name, timings, counter.count / rounds, items)
+        return result
+
+    def report(self, name, timings, queries, items=None):
+        """
+        Reports the p50/p99 times of the runs of an operation.
+        :param timings: The times of the runs in seconds.
+        :param queries: The average number of database queries per run.
+        :param items: The number of items an operation processes, to report its throughput.
+        """
+        median = percentile(timings, 50)
+        throughput = f", {items / median:.0f} items/s" if items else ""
+        self.stdout.write(
+            f"{name}: p50 {median * 1000:.3f} ms, p99 {percentile(timings, 99) * 1000:.3f} ms, "
+            f"{queries:.1f} DB queries per run{throughput}"
+        )
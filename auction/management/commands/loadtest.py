@@ -0,0 +1,262 @@
+"""
+Load test of the bid WebSocket and the auction REST API.
+
+The simulated clients drive the ASGI application served by daphne in-process, so the numbers cover the consumers,
+the channel layer, the services and the database, but not the network. Run it against a local database, e.g.:
+
+    python manage.py loadtest --watchers 200 --bidders 10 --bids 50 --in-memory-layer
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import math
+import threading
+import time
+from datetime import timedelta
+
+from channels.testing import HttpCommunicator, WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from auction.models import Auction
+from auction.statistics import statistics_service
+from charityAuctionProject.asgi import application
+
+LOADTEST_USER_PREFIX = "loadtest_"
+HOST_HEADER = [(b"host", b"localhost")]
+RECEIVE_TIMEOUT = 5
+DRAIN_TIMEOUT = 5
+
+
+class QueryCounter:
+    """
+    Counts the queries executed on every database connection, including the ones opened by the worker threads.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self):
+        connection_created.connect(self._on_connection_created)
+        for connection in connections.all():
+            self._add(connection)
+
+    def uninstall(self):
+        connection_created.disconnect(self._on_connection_created)
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+    def _on_connection_created(self, sender, connection, **kwargs):
+        self._add(connection)
+
+    def _add(self, connection):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+def percentile(values, percent):
+    """
+    Returns the nearest-rank percentile of the values, None if there are none.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
+
+
+def get_frame_prices(text_data):
+    """
+    Returns the prices of the bids in a frame sent to the auction group, a single bid or a coalesced batch.
+    """
+    frame = json.loads(text_data)
+    if "bids" in frame:
+        return [bid["price"] for bid in frame["bids"]]
+    if "price" in frame:
+        return [frame["price"]]
+    return []
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs simulated WebSocket watchers and bidders on a new auction, then REST clients on the auction list and "
+        "detail, and reports accepted bids per second, broadcast fan-out latency and database queries per bid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--watchers", type=int, default=50, help="WebSocket clients that only receive bids.")
+        parser.add_argument("--bidders", type=int, default=5, help="WebSocket clients that place bids.")
+        parser.add_argument("--bids", type=int, default=50, help="Bids placed by every bidder.")
+        parser.add_argument("--rest-clients", type=int, default=5, help="Concurrent REST clients.")
+        parser.add_argument("--requests", type=int, default=50, help="Requests sent by every REST client.")
+        parser.add_argument(
+            "--in-memory-layer", action="store_true", help="Use the in-memory channel layer instead of the configured."
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the created users, auction and bids.")
+
+    def handle(self, *args, **options):
+        layer_settings = contextlib.nullcontext()
+        if options["in_memory_layer"]:
+            layer_settings = override_settings(
+                CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+            )
+
+        auction, users = self.create_fixtures(options["bidders"])
+        counter = QueryCounter()
+        counter.install()
+        try:
+            with layer_settings:
+                asyncio.run(self.run(auction, users, counter, options))
+        finally:
+            counter.uninstall()
+            if not options["keep"]:
+                auction.delete()
+                User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def create_fixtures(self, bidders):
+        """
+        Creates the bidders, a watcher user and a running auction.
+        """
+        suffix = int(time.time() * 1000)
+        users = [
+            User.objects.create_user(f"{LOADTEST_USER_PREFIX}{suffix}_{number}", f"{number}@loadtest.local")
+            for number in range(bidders + 1)
+        ]
+        now = timezone.now()
+        auction = Auction.objects.create(
+            title="Load test",
+            description="Created by the loadtest command",
+            initial_price=1,
+            min_bid_price_gap=1,
+            author=users[0],
+            started=True,
+            start_time=now - timedelta(minutes=1),
+            end_time=now + timedelta(hours=1),
+        )
+        # Created as started, so it is added to the running statistics here instead of by the lifecycle engine
+        statistics_service.record_started_auctions(1)
+        return auction, users
+
+    async def run(self, auction, users, counter, options):
+        tokens = [str(RefreshToken.for_user(user).access_token) for user in users]
+        path = f"/api/v1/ws/auctions/{auction.id}/bids?token="
+
+        watchers = [WebsocketCommunicator(application, path + tokens[0]) for _ in range(options["watchers"])]
+        bidders = [WebsocketCommunicator(application, path + token) for token in tokens[1:]]
+        for communicator in watchers + bidders:
+            connected, _ = await communicator.connect(timeout=RECEIVE_TIMEOUT)
+            if not connected:
+                raise RuntimeError("The WebSocket connection was rejected")
+            await communicator.receive_from(timeout=RECEIVE_TIMEOUT)
+
+        sent_at = {}
+        latencies = []
+        results = {"accepted": 0, "rejected": 0, "last_price": None}
+        prices = itertools.count(auction.initial_price + auction.min_bid_price_gap, auction.min_bid_price_gap)
+
+        counter.reset()
+        started = time.perf_counter()
+        last_prices = [None] * len(watchers)
+        watching = [
+            asyncio.create_task(self.watch(watcher, sent_at, latencies, last_prices, index))
+            for index, watcher in enumerate(watchers)
+        ]
+        await asyncio.gather(*(self.bid(bidder, options["bids"], prices, sent_at, results) for bidder in bidders))
+        elapsed = time.perf_counter() - started
+        queries = counter.count
+        drain_deadline = time.perf_counter() + DRAIN_TIMEOUT
+        while any(price != results["last_price"] for price in last_prices) and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.01)
+        for task in watching:
+            task.cancel()
+        await asyncio.gather(*watching, return_exceptions=True)
+        for communicator in watchers + bidders:
+            await communicator.disconnect()
+
+        accepted = results["accepted"]
+        self.stdout.write(
+            f"Bids: {accepted} accepted, {results['rejected']} rejected in {elapsed:.2f} s "
+            f"({accepted / elapsed:.1f} bids/s)"
+        )
+        self.stdout.write(
+            f"Fan-out latency ({len(watchers)} watchers, {len(latencies)} deliveries): "
+            f"p50 {self.format_ms(percentile(latencies, 50))}, p99 {self.format_ms(percentile(latencies, 99))}"
+        )
+        self.stdout.write(f"DB queries per accepted bid: {queries / accepted:.2f}" if accepted else "No bid accepted")
+
+        counter.reset()
+        request_latencies = []
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(self.request(auction, options["requests"], request_latencies) for _ in range(options["rest_clients"]))
+        )
+        elapsed = time.perf_counter() - started
+        requests = len(request_latencies)
+        if requests:
+            self.stdout.write(
+                f"REST: {requests} requests in {elapsed:.2f} s ({requests / elapsed:.1f} requests/s), "
+                f"p50 {self.format_ms(percentile(request_latencies, 50))}, "
+                f"p99 {self.format_ms(percentile(request_latencies, 99))}, "
+                f"{counter.count / requests:.2f} DB queries per request"
+            )
+
+    async def bid(self, communicator, bids, prices, sent_at, results):
+        """
+        Places bids one after another, waiting for each to be broadcast back or rejected.
+        """
+        for _ in range(bids):
+            price = next(prices)
+            sent_at[price] = time.perf_counter()
+            await communicator.send_to(text_data=json.dumps({"price": price}))
+            while True:
+                text_data = await communicator.receive_from(timeout=RECEIVE_TIMEOUT)
+                if price in get_frame_prices(text_data):
+                    results["accepted"] += 1
+                    results["last_price"] = max(results["last_price"] or 0, price)
+                    break
+                if "detail" in json.loads(text_data):
+                    results["rejected"] += 1
+                    break
+
+    async def watch(self, communicator, sent_at, latencies, last_prices, index):
+        """
+        Receives the broadcast bids until it is cancelled, recording the highest received price at last_prices[index].
+        """
+        while True:
+            text_data = await communicator.receive_from(timeout=None)
+            received_at = time.perf_counter()
+            for price in get_frame_prices(text_data):
+                latencies.append(received_at - sent_at[price])
+                last_prices[index] = max(last_prices[index] or 0, price)
+
+    async def request(self, auction, requests, latencies):
+        """
+        Alternates requests to the auction list and the auction detail.
+        """
+        paths = itertools.cycle(["/api/v1/auctions/", f"/api/v1/auctions/{auction.id}/"])
+        for _ in range(requests):
+            started = time.perf_counter()
+            communicator = HttpCommunicator(application, "GET", next(paths), headers=HOST_HEADER)
+            response = await communicator.get_response(timeout=RECEIVE_TIMEOUT)
+            await communicator.send_input({"type": "http.disconnect"})
+            await communicator.wait(timeout=RECEIVE_TIMEOUT)
+            if response["status"] != 200:
+                raise RuntimeError(f"Unexpected response status {response['status']}")
+            latencies.append(time.perf_counter() - started)
+
+    def format_ms(self, seconds):
+        return "n/a" if seconds is None else f"{seconds * 1000:.1f} ms"
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 21:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0006_bid_leader"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["started", "finished", "start_time"], name="auction_start_due_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["finished", "end_time"], name="auction_end_due_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["auction", "-price"], name="bid_auction_price_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["auction", "-created"], name="bid_auction_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(condition=models.Q(("leader", True)), fields=["auction"], name="bid_auction_leader_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(condition=models.Q(("won", True)), fields=["auction"], name="bid_auction_won_idx"),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.2 on 2026-10-18 21:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_bid_summary(apps, schema_editor):
+    """
+    Computes current_price, leader_bid and bid_count of every auction from its existing bids.
+    """
+    Auction = apps.get_model("auction", "Auction")
+    Bid = apps.get_model("auction", "Bid")
+
+    highest_bid = Bid.objects.filter(auction_id=OuterRef("pk")).order_by("-price")
+    bid_count = Bid.objects.filter(auction_id=OuterRef("pk")).order_by().values("auction_id")
+    bid_count = bid_count.annotate(count=Count("id"))
+    Auction.objects.update(
+        current_price=Coalesce(Subquery(highest_bid.values("price")[:1]), 0),
+        leader_bid=Subquery(highest_bid.values("id")[:1]),
+        bid_count=Coalesce(Subquery(bid_count.values("count")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0007_bid_auction_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auction",
+            name="bid_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="auction",
+            name="current_price",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="auction",
+            name="leader_bid",
+            field=models.ForeignKey(
+                blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="auction.bid"
+            ),
+        ),
+        migrations.RunPython(backfill_bid_summary, migrations.RunPython.noop),
+    ]
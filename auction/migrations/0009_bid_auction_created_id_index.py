@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 21:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0008_auction_bid_summary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="bid",
+            name="bid_auction_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(fields=["auction", "-created", "-id"], name="bid_auction_created_id_idx"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 21:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0009_bid_auction_created_id_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auction",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.2 on 2026-10-18 22:05
+
+from django.db import migrations
+
+# The expression of the search vector has to match auction.search.search_postgresql to be served by the index
+CREATE_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS auction_search_vector_idx ON auction_auction USING GIN (("
+    "setweight(to_tsvector('simple'::regconfig, COALESCE(title, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, COALESCE(description, '')), 'B')))",
+    # Typo tolerant title search (the % operator)
+    "CREATE INDEX IF NOT EXISTS auction_title_trgm_idx ON auction_auction USING GIN (title gin_trgm_ops)",
+    # title__icontains of AuctionFilter, which is UPPER(title::text) LIKE UPPER('%...%') on PostgreSQL
+    "CREATE INDEX IF NOT EXISTS auction_title_upper_trgm_idx ON auction_auction "
+    "USING GIN ((UPPER(title::text)) gin_trgm_ops)",
+]
+DROP_INDEXES = [
+    "DROP INDEX IF EXISTS auction_title_upper_trgm_idx",
+    "DROP INDEX IF EXISTS auction_title_trgm_idx",
+    "DROP INDEX IF EXISTS auction_search_vector_idx",
+]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        # Other databases search with the in-process index of auction.search
+        if schema_editor.connection.vendor == "postgresql":
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0010_auction_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(CREATE_INDEXES), run_on_postgresql(DROP_INDEXES)),
+    ]
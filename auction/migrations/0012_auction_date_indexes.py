@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 22:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0011_auction_search_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["start_time"], name="auction_start_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="auction",
+            index=models.Index(fields=["end_time"], name="auction_end_time_idx"),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.0.2 on 2026-10-18 22:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+CHARITY_STATISTICS_ID = 1
+
+
+def backfill_statistics(apps, schema_editor):
+    """
+    Computes the bidders of every auction, the donor totals and the charity totals from the existing bids.
+    """
+    Auction = apps.get_model("auction", "Auction")
+    Bid = apps.get_model("auction", "Bid")
+    AuctionBidder = apps.get_model("auction", "AuctionBidder")
+    DonorStatistics = apps.get_model("auction", "DonorStatistics")
+    CharityStatistics = apps.get_model("auction", "CharityStatistics")
+
+    bidders = Bid.objects.order_by().values("auction_id", "author_id")
+    bidders = bidders.annotate(bid_count=Count("id"), highest_price=Max("price"))
+    AuctionBidder.objects.bulk_create((AuctionBidder(**bidder) for bidder in bidders.iterator()), batch_size=1000)
+
+    bidder_count = AuctionBidder.objects.filter(auction_id=OuterRef("pk")).order_by().values("auction_id")
+    bidder_count = bidder_count.annotate(count=Count("id"))
+    Auction.objects.update(bidder_count=Coalesce(Subquery(bidder_count.values("count")), 0))
+
+    donors = {
+        row["author_id"]: DonorStatistics(user_id=row["author_id"], auction_count=row["auction_count"])
+        for row in AuctionBidder.objects.order_by().values("author_id").annotate(auction_count=Count("id"))
+    }
+    winners = Bid.objects.filter(won=True).order_by().values("author_id")
+    for row in winners.annotate(won_count=Count("id"), raised_amount=Sum("price")):
+        donors[row["author_id"]].won_count = row["won_count"]
+        donors[row["author_id"]].raised_amount = row["raised_amount"]
+    DonorStatistics.objects.bulk_create(donors.values(), batch_size=1000)
+
+    finished = Auction.objects.filter(finished=True).aggregate(count=Count("id"), bid_count=Sum("bid_count"))
+    raised_amount = Bid.objects.filter(won=True).aggregate(total=Sum("price"))["total"]
+    CharityStatistics.objects.create(
+        id=CHARITY_STATISTICS_ID,
+        finished_auction_count=finished["count"],
+        bid_count=finished["bid_count"] or 0,
+        raised_amount=raised_amount or 0,
+        donor_count=len(donors),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0012_auction_date_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CharityStatistics",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("finished_auction_count", models.PositiveIntegerField(default=0)),
+                ("bid_count", models.PositiveBigIntegerField(default=0)),
+                ("raised_amount", models.PositiveBigIntegerField(default=0)),
+                ("donor_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="auction",
+            name="bidder_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="DonorStatistics",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("auction_count", models.PositiveIntegerField(default=0)),
+                ("won_count", models.PositiveIntegerField(default=0)),
+                ("raised_amount", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["-raised_amount"], name="donor_raised_amount_idx")],
+            },
+        ),
+        migrations.CreateModel(
+            name="AuctionBidder",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("bid_count", models.PositiveIntegerField(default=0)),
+                ("highest_price", models.PositiveIntegerField(default=0)),
+                ("auction", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="auction.auction")),
+                (
+                    "author",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["auction", "-highest_price"], name="auction_bidder_price_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="auctionbidder",
+            constraint=models.UniqueConstraint(fields=("auction", "author"), name="auction_bidder_unique"),
+        ),
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0013_auction_statistics"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="charitystatistics",
+            name="donor_count",
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:50
+
+from django.db import migrations
+
+# The expressions have to match auction.filters.DatePartFilter to be served by the indexes, the time zone is TIME_ZONE
+DATE_PART_INDEXES = [
+    (f"auction_{field}_{part}_idx", f"EXTRACT({part.upper()} FROM ({field} AT TIME ZONE 'Europe/Kiev'))")
+    for field in ("start_time", "end_time")
+    for part in ("month", "day", "hour", "minute")
+]
+CREATE_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS {name} ON auction_auction (({expression}))" for name, expression in DATE_PART_INDEXES
+]
+DROP_INDEXES = [f"DROP INDEX IF EXISTS {name}" for name, _ in DATE_PART_INDEXES]
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        # Other databases store the wall-clock time, their date part filters are not indexed
+        if schema_editor.connection.vendor == "postgresql":
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0014_remove_charitystatistics_donor_count"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_postgresql(CREATE_INDEXES), run_on_postgresql(DROP_INDEXES)),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.2 on 2026-10-18 23:55
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+CHARITY_STATISTICS_ID = 1
+
+
+def backfill_statistics(apps, schema_editor):
+    """
+    Counts the donors and sums the running auctions into the charity statistics.
+    """
+    Auction = apps.get_model("auction", "Auction")
+    DonorStatistics = apps.get_model("auction", "DonorStatistics")
+    CharityStatistics = apps.get_model("auction", "CharityStatistics")
+
+    running = Auction.objects.filter(started=True, finished=False).aggregate(
+        count=Count("id"), bid_count=Sum("bid_count"), pledged_amount=Sum("current_price")
+    )
+    CharityStatistics.objects.get_or_create(pk=CHARITY_STATISTICS_ID)
+    CharityStatistics.objects.filter(pk=CHARITY_STATISTICS_ID).update(
+        donor_count=DonorStatistics.objects.count(),
+        running_auction_count=running["count"],
+        running_bid_count=running["bid_count"] or 0,
+        pledged_amount=running["pledged_amount"] or 0,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auction", "0015_auction_date_part_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="charitystatistics",
+            name="donor_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="charitystatistics",
+            name="pledged_amount",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="charitystatistics",
+            name="running_auction_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="charitystatistics",
+            name="running_bid_count",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
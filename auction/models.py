@@ -6,6 +6,8 @@ from django.utils import timezone
 
 MAX_AUCTION_TITLE_LENGTH = 50
 MIN_AUCTION_DURATION = timedelta(seconds=10)
+# Primary key of the single CharityStatistics row
+CHARITY_STATISTICS_ID = 1
 
 
 def get_auto_end_time():
@@ -23,6 +25,24 @@ class Auction(models.Model):
     finished = models.BooleanField(default=False)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
+    # Summary of the accepted bids, kept up to date by the bid service
+    current_price = models.PositiveIntegerField(default=0)
+    leader_bid = models.ForeignKey("Bid", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    bid_count = models.PositiveIntegerField(default=0)
+    bidder_count = models.PositiveIntegerField(default=0)
+    # Time of the last change of the auction, its bids or photos, used as the HTTP validator of their responses.
+    # Bulk .update() calls have to set it explicitly.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Scheduler: pending auctions by start time and running auctions by end time
+            models.Index(fields=["started", "finished", "start_time"], name="auction_start_due_idx"),
+            models.Index(fields=["finished", "end_time"], name="auction_end_due_idx"),
+            # Range and year filters of AuctionFilter, Django compiles the year lookups to ranges
+            models.Index(fields=["start_time"], name="auction_start_time_idx"),
+            models.Index(fields=["end_time"], name="auction_end_time_idx"),
+        ]
 
 
 class Bid(models.Model):
@@ -35,8 +55,60 @@ class Bid(models.Model):
 
     class Meta:
         ordering = ["created"]
+        indexes = [
+            # Latest bid by price and bid history of an auction, the latter also serves the (created, id) keyset
+            models.Index(fields=["auction", "-price"], name="bid_auction_price_idx"),
+            models.Index(fields=["auction", "-created", "-id"], name="bid_auction_created_id_idx"),
+            # Leader and winner lookups of an auction
+            models.Index(fields=["auction"], condition=models.Q(leader=True), name="bid_auction_leader_idx"),
+            models.Index(fields=["auction"], condition=models.Q(won=True), name="bid_auction_won_idx"),
+        ]
 
 
 class AuctionPhoto(models.Model):
     auction = models.ForeignKey(Auction, on_delete=models.CASCADE)
     photo = models.ImageField(upload_to="auction_photos/")
+
+
+class AuctionBidder(models.Model):
+    # Summary of the bids of a user in an auction, kept up to date by the bid service (see auction.statistics)
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE)
+    author = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
+    bid_count = models.PositiveIntegerField(default=0)
+    highest_price = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["auction", "author"], name="auction_bidder_unique"),
+        ]
+        indexes = [
+            # Top bidders of an auction
+            models.Index(fields=["auction", "-highest_price"], name="auction_bidder_price_idx"),
+        ]
+
+
+class DonorStatistics(models.Model):
+    # Totals of a user over all auctions, the won auctions and the raised amount are added when the auctions finish
+    user = models.OneToOneField(get_user_model(), primary_key=True, on_delete=models.CASCADE)
+    auction_count = models.PositiveIntegerField(default=0)
+    won_count = models.PositiveIntegerField(default=0)
+    raised_amount = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Top donors
+            models.Index(fields=["-raised_amount"], name="donor_raised_amount_idx"),
+        ]
+
+
+class CharityStatistics(models.Model):
+    # Totals of all finished auctions, stored in the single row with the ID CHARITY_STATISTICS_ID
+    finished_auction_count = models.PositiveIntegerField(default=0)
+    bid_count = models.PositiveBigIntegerField(default=0)
+    raised_amount = models.PositiveBigIntegerField(default=0)
+    # Users with DonorStatistics and the totals of the running auctions, also decreased, so they are signed to never
+    # fail a bid or a scheduler tick
+    donor_count = models.IntegerField(default=0)
+    running_auction_count = models.IntegerField(default=0)
+    running_bid_count = models.BigIntegerField(default=0)
+    pledged_amount = models.BigIntegerField(default=0)
@@ -0,0 +1,167 @@
+"""
+Compact MessagePack protocol of the auction WebSocket, negotiated with the "auction.msgpack.v1" subprotocol.
+
+Every frame is a binary MessagePack array starting with the frame type:
+    ["page", count, next, previous, [bid, ...], [highest bid, ...], authors]
+    ["bid", bid, authors]
+    ["bids", [bid, ...], authors]
+    ["winner", bid, authors]
+    ["delta", since_bid_id, [bid, ...], authors]
+    ["resync", since_bid_id]
+    ["error", detail, status_code]
+
+A bid is the tuple [id, price, author_id, created as epoch milliseconds, flags], flags combine BID_WON and BID_LEADER.
+Authors is a list of [author_id, username, email] and only contains the authors not yet sent on the connection.
+Clients send bids as MessagePack maps, e.g. {"price": 100}.
+"""
+
+from datetime import datetime
+
+from rest_framework.exceptions import APIException
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = "auction.msgpack.v1"
+
+PAGE_FRAME = "page"
+BID_FRAME = "bid"
+BIDS_FRAME = "bids"
+WINNER_FRAME = "winner"
+DELTA_FRAME = "delta"
+RESYNC_FRAME = "resync"
+ERROR_FRAME = "error"
+
+BID_WON = 1
+BID_LEADER = 2
+
+
+def is_available():
+    return msgpack is not None
+
+
+def pack(frame):
+    return msgpack.packb(frame, use_bin_type=True)
+
+
+def unpack(data):
+    """
+    Parses a binary frame sent by the client.
+
+    :param data: The frame bytes.
+    :return: The decoded data.
+    :raises ValueError: If the frame is not valid MessagePack.
+    """
+    return msgpack.unpackb(data, raw=False)
+
+
+def compact_bid(bid):
+    """
+    Converts a bid serialized by BidSerializer into its compact tuple form.
+
+    :param bid: The serialized bid.
+    :return: The list [id, price, author_id, created epoch ms, flags].
+    """
+    flags = (BID_WON if bid["won"] else 0) | (BID_LEADER if bid["leader"] else 0)
+    created = int(datetime.fromisoformat(bid["created"]).timestamp() * 1000)
+    return [bid["id"], bid["price"], bid["author"]["id"], created, flags]
+
+
+def compact_author(author):
+    return [author["id"], author["username"], author["email"]]
+
+
+def collect_authors(bids, known_authors):
+    """
+    Returns the authors of the serialized bids that were not sent yet and marks them as sent.
+
+    :param bids: The serialized bids.
+    :param known_authors: The set of author IDs already sent on the connection, updated in place.
+    :return: A list of [author_id, username, email].
+    """
+    authors = []
+    for bid in bids:
+        author = bid["author"]
+        if author["id"] not in known_authors:
+            known_authors.add(author["id"])
+            authors.append(compact_author(author))
+    return authors
+
+
+def pack_page(page, known_authors):
+    """
+    Packs the initial payload of a connection.
+
+    :param page: The paginated dictionary of serialized bids with the "highest_bids" list.
+    :param known_authors: The set of author IDs already sent on the connection, updated in place.
+    :return: The frame bytes.
+    """
+    authors = collect_authors(page["results"] + page["highest_bids"], known_authors)
+    return pack(
+        [
+            PAGE_FRAME,
+            page["count"],
+            page["next"],
+            page["previous"],
+            [compact_bid(bid) for bid in page["results"]],
+            [compact_bid(bid) for bid in page["highest_bids"]],
+            authors,
+        ]
+    )
+
+
+def pack_bid(bid, frame_type=BID_FRAME):
+    """
+    Packs a bid frame once for all connections.
+
+    :param bid: The serialized bid.
+    :param frame_type: BID_FRAME or WINNER_FRAME.
+    :return: A tuple of the frame without and with the author entry, for connections that know the author or not.
+    """
+    compact = compact_bid(bid)
+    return (
+        pack([frame_type, compact, []]),
+        pack([frame_type, compact, [compact_author(bid["author"])]]),
+    )
+
+
+def pack_bids(bids):
+    """
+    Packs the bids of a coalescing window once for all connections. The authors of every bid are included.
+
+    :param bids: The serialized bids, the last one is the leader.
+    :return: The frame bytes.
+    """
+    authors = collect_authors(bids, set())
+    return pack([BIDS_FRAME, [compact_bid(bid) for bid in bids], authors])
+
+
+def pack_delta(since_bid_id, bids, known_authors):
+    """
+    Packs the bids missed by a resuming connection.
+
+    :param since_bid_id: The ID of the last bid the client has seen.
+    :param bids: The serialized missed bids.
+    :param known_authors: The set of author IDs already sent on the connection, updated in place.
+    :return: The frame bytes.
+    """
+    authors = collect_authors(bids, known_authors)
+    return pack([DELTA_FRAME, since_bid_id, [compact_bid(bid) for bid in bids], authors])
+
+
+def pack_resync(since_bid_id):
+    return pack([RESYNC_FRAME, since_bid_id])
+
+
+def pack_error(e):
+    """
+    Packs an API exception or the message of any other exception.
+
+    :param e: The exception.
+    :return: The frame bytes.
+    """
+    if isinstance(e, APIException):
+        return pack([ERROR_FRAME, e.detail, e.status_code])
+    return pack([ERROR_FRAME, str(e), None])
@@ -0,0 +1,160 @@
+"""
+In-process buffer of the latest bids of every auction, used to resume reconnecting WebSocket clients.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+REPLAY_BUFFER_CONFIG = getattr(settings, "AUCTION_REPLAY_BUFFER", {})
+
+
+class ReplayRun:
+    """
+    Contiguous run of the latest bids of an auction.
+
+    base_id is the ID of the bid preceding the first bid of the run (or the ID the run was seeded from), so the run
+    holds every bid of the auction placed after base_id. Bid IDs start at 1, so 0 stands for "no bid".
+    """
+
+    def __init__(self, base_id, size):
+        self.base_id = base_id
+        self.size = size
+        self.bids = deque()
+
+    @property
+    def last_id(self):
+        return self.bids[-1]["id"] if self.bids else self.base_id
+
+    def append(self, bid):
+        if len(self.bids) >= self.size:
+            self.base_id = self.bids.popleft()["id"]
+        self.bids.append(bid)
+
+    def since(self, since_bid_id):
+        if since_bid_id == self.base_id:
+            return list(self.bids)
+        ids = [bid["id"] for bid in self.bids]
+        index = bisect_left(ids, since_bid_id)
+        if index == len(ids) or ids[index] != since_bid_id:
+            return None
+        return list(self.bids)[index + 1:]
+
+
+class ReplayBuffer:
+    """
+    Keeps the last bids of the auctions this process broadcasts, filled from the group events.
+
+    Bids of an auction are placed one after another under the auction row lock, so every bid knows the ID of the
+    bid it replaced as the leader. A bid is only appended if it follows the last bid of the run, otherwise the run
+    is restarted from it, so a run never has gaps. A run is only used if it ends with the current leader bid of the
+    auction, so a process that stopped receiving the events of an auction never serves stale bids.
+    """
+
+    def __init__(self, size=REPLAY_BUFFER_CONFIG.get("SIZE", 200),
+                 max_auctions=REPLAY_BUFFER_CONFIG.get("MAX_AUCTIONS", 1024)):
+        """
+        :param size: Maximum number of bids kept per auction, 0 disables the buffer.
+        :param max_auctions: Maximum number of auctions kept, the least recently updated is evicted first.
+        """
+        self.size = size
+        self.max_auctions = max_auctions
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has(self, auction_id, bid_id):
+        """
+        Checks if a bid was already appended, so repeated group events can be skipped before decoding them.
+
+        :param auction_id: The ID of the auction.
+        :param bid_id: The ID of the bid.
+        """
+        run = self._runs.get(int(auction_id))
+        return run is not None and bid_id <= run.last_id
+
+    def get_last_id(self, auction_id):
+        """
+        Returns the ID of the last bid appended for an auction, None if the auction is not in the buffer.
+
+        :param auction_id: The ID of the auction.
+        """
+        run = self._runs.get(int(auction_id))
+        return None if run is None else run.last_id
+
+    def append(self, auction_id, previous_bid_id, bid):
+        """
+        Appends a bid to the run of its auction.
+
+        :param auction_id: The ID of the auction.
+        :param previous_bid_id: The ID of the leader bid replaced by the bid, None for the first bid.
+        :param bid: The serialized bid.
+        """
+        if self.size <= 0:
+            return
+
+        auction_id = int(auction_id)
+        with self._lock:
+            run = self._runs.get(auction_id)
+            if run is not None and bid["id"] <= run.last_id:
+                return
+            if run is None or run.last_id != (previous_bid_id or 0):
+                run = ReplayRun(previous_bid_id or 0, self.size)
+            self._store(auction_id, run)
+            run.append(bid)
+
+    def seed(self, auction_id, since_bid_id, bids):
+        """
+        Replaces the run of an auction with bids loaded from the database.
+
+        :param auction_id: The ID of the auction.
+        :param since_bid_id: The ID the bids were loaded after.
+        :param bids: Every serialized bid of the auction placed after since_bid_id, ordered by ID.
+        """
+        if self.size <= 0:
+            return
+
+        run = ReplayRun(since_bid_id, self.size)
+        for bid in bids:
+            run.append(bid)
+        with self._lock:
+            self._store(int(auction_id), run)
+
+    def since(self, auction_id, since_bid_id, leader_bid_id):
+        """
+        Returns the bids placed after a bid.
+
+        :param auction_id: The ID of the auction.
+        :param since_bid_id: The ID of the last bid the client has seen, 0 if it has not seen any bid.
+        :param leader_bid_id: The ID of the current leader bid of the auction, None if there is no bid.
+        :return: The list of serialized bids ordered by ID, or None if the buffer can not answer.
+        """
+        with self._lock:
+            run = self._runs.get(int(auction_id))
+            if run is None or run.last_id != (leader_bid_id or 0):
+                return None
+            bids = run.since(since_bid_id)
+        if not bids:
+            return bids
+        # The bids were buffered as they were placed, each as the leader, only the last one still is
+        return [{**bid, "leader": False} for bid in bids[:-1]] + bids[-1:]
+
+    def discard(self, *auction_ids):
+        """
+        Removes auctions from the buffer, e.g. after they were finished.
+
+        :param auction_ids: The IDs of the auctions.
+        """
+        with self._lock:
+            for auction_id in auction_ids:
+                self._runs.pop(int(auction_id), None)
+
+    def _store(self, auction_id, run):
+        self._runs[auction_id] = run
+        self._runs.move_to_end(auction_id)
+        while len(self._runs) > self.max_auctions:
+            self._runs.popitem(last=False)
+
+
+replay_buffer = ReplayBuffer()
@@ -2,78 +2,241 @@
     This module provides functions for managing auction events and WebSocket groups.
 """
 
+import logging
+import threading
+from datetime import timedelta
+
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Min
 from django.utils import timezone
 
+from auction import protocol
+from auction.bid_book import bid_book
+from auction.cache import auction_cache
 from auction.consumers import get_group_name
-from auction.helpers.models import get_latest_bid_where_auction_id
-from auction.models import Auction
+from auction.models import Auction, Bid
+from auction.serializers import BidSerializer
+from auction.statistics import statistics_service
+from charityAuctionProject.encoding import dumps
+from charityAuctionProject.metrics import SCHEDULER, measure
+
+LIFECYCLE_JOB_ID = "auction_lifecycle"
+# Upper bound of the sleep between two runs, so changes made outside this process are picked up as well
+MAX_IDLE_INTERVAL = timedelta(seconds=60)
+RETRY_INTERVAL = timedelta(seconds=1)
+
+_logger = logging.getLogger(__name__)
 
 
 def handle_auctions():
     """
     Automatically checks auction instance flags on started and finished auction events.
-    This function runs periodically to monitor auction events and take appropriate actions.
+    This function runs whenever the nearest start_time or end_time is due (see AuctionLifecycleEngine).
 
     It checks auctions that are scheduled to start or finish based on their start_time and end_time fields.
-    If the current time is after the start_time, it marks the auction as started.
-    If the current time is after the end_time, it marks the auction as finished, determines the winner bid (if any),
-    and closes the associated auction group.
+    Auctions whose start_time has passed are marked as started with a single update.
+    Auctions whose end_time has passed are marked as finished, their winner bids are marked in one statement,
+    they are added to the donor and charity statistics and the associated auction groups are closed with the winner
+    payload serialized once per auction.
+    The cached responses of the started and finished auctions are invalidated.
 
     :return: None
     """
     now = timezone.now()
+    started_ids = start_auctions(now)
+    finished_ids = finish_auctions(now)
+    if started_ids or finished_ids:
+        auction_cache.invalidate(*started_ids, *finished_ids, lists=True)
+    if not finished_ids:
+        return
+
+    winners = get_winner_payloads(finished_ids)
+    for auction_id in finished_ids:
+        async_to_sync(close_auction_group)(auction_id, winners.get(auction_id))
+
+
+def start_auctions(now):
+    """
+    Marks all auctions whose start_time has passed as started and adds them to the running statistics.
+
+    :param now: The current time.
+    :return: The IDs of the started auctions.
+    """
+    auction_ids = list(
+        Auction.objects.filter(started=False, finished=False, start_time__lte=now).values_list("id", flat=True)
+    )
+    if auction_ids:
+        with transaction.atomic():
+            started = Auction.objects.filter(id__in=auction_ids, started=False).update(
+                started=True, updated_at=timezone.now()
+            )
+            statistics_service.record_started_auctions(started)
+    return auction_ids
+
+
+def finish_auctions(now):
+    """
+    Marks all running auctions whose end_time has passed as finished and inactive, marks the leader bid
+    of each of them as the winner and adds them to the statistics.
+
+    :param now: The current time.
+    :return: The IDs of the finished auctions.
+    """
+    with transaction.atomic():
+        auction_ids = list(
+            Auction.objects.select_for_update(skip_locked=True)
+            .filter(started=True, finished=False, end_time__lte=now)
+            .values_list("id", flat=True)
+        )
+        if not auction_ids:
+            return auction_ids
 
-    # Check auctions scheduled to start
-    auctions_to_start = Auction.objects.filter(started=False, finished=False)
-    for auction in auctions_to_start:
-        if now < auction.start_time:
-            continue
+        Auction.objects.filter(id__in=auction_ids).update(finished=True, active=False, updated_at=timezone.now())
+        leader_bids = Auction.objects.filter(id__in=auction_ids, leader_bid__isnull=False).values("leader_bid_id")
+        Bid.objects.filter(id__in=leader_bids).update(won=True)
+        statistics_service.record_finished_auctions(auction_ids)
 
-        auction.started = True
-        auction.save()
+    bid_book.discard(*auction_ids)
+    return auction_ids
 
-    # Check auctions scheduled to finish
-    auctions_to_finish = Auction.objects.filter(finished=False, started=True)
-    for auction in auctions_to_finish:
-        if now < auction.end_time:
-            continue
 
-        auction.finished = True
-        auction.active = False
-        bid = get_latest_bid_where_auction_id(auction.id, "price")
-        if bid is not None:
-            bid.won = True
-            bid.save()
+def get_winner_payloads(auction_ids):
+    """
+    Serializes the winner bids of finished auctions, as JSON and as MessagePack frames (see auction.protocol).
 
-        auction.save()
+    :param auction_ids: The IDs of the finished auctions.
+    :return: A dictionary mapping auction IDs to the close_channel event fields of their winner bid,
+        auctions without a winner are omitted.
+    """
+    payloads = {}
+    for bid in Bid.objects.filter(auction_id__in=auction_ids, won=True).select_related("author"):
+        data = BidSerializer(bid).data
+        payloads[bid.auction_id] = {
+            "winner": dumps(data),
+            "winner_author_id": bid.author_id,
+            "winner_packed": protocol.pack_bid(data, protocol.WINNER_FRAME) if protocol.is_available() else None,
+        }
+    return payloads
+
+
+def get_next_deadline():
+    """
+    Returns the nearest start_time of a pending auction or end_time of a running auction.
 
-        async_to_sync(close_auction_group)(auction)
+    :return: The nearest deadline or None if no auction is waiting for a transition.
+    """
+    next_start = Auction.objects.filter(started=False, finished=False).aggregate(due=Min("start_time"))["due"]
+    next_end = Auction.objects.filter(started=True, finished=False).aggregate(due=Min("end_time"))["due"]
+    deadlines = [deadline for deadline in (next_start, next_end) if deadline is not None]
+    return min(deadlines) if deadlines else None
 
 
-def close_auction_group(auction):
+def close_auction_group(auction_id, winner=None):
     """
     Closes the WebSocket group associated with a finished auction.
 
-    :param auction: The Auction instance for which the WebSocket group should be closed.
+    :param auction_id: The ID of the auction for which the WebSocket group should be closed.
+    :param winner: The winner payload from get_winner_payloads that is forwarded to every consumer as is,
+        None if there is no winner.
     :return: None
     """
-    auction_group_name = get_group_name(auction.id)
+    auction_group_name = get_group_name(auction_id)
     channel_layer = get_channel_layer()
-    return channel_layer.group_send(auction_group_name, {"type": "close_channel", "mess": "finish"})
+    return channel_layer.group_send(auction_group_name, {"type": "close_channel", "mess": "finish", **(winner or {})})
+
+
+class AuctionLifecycleEngine:
+    """
+    Runs handle_auctions exactly when the nearest auction start or end is due instead of polling every second.
+
+    After every run the engine asks the database for the next deadline and reschedules a single date job for it.
+    Views call wake() after creating or updating an auction, so a new earlier deadline is picked up immediately.
+    """
+
+    def __init__(self):
+        self.scheduler = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the background scheduler and plans the first run.
+
+        :return: None
+        """
+        self.scheduler = BackgroundScheduler()
+        self.scheduler.start()
+        self._add_job(timezone.now())
+
+    def wake(self):
+        """
+        Recomputes the next deadline, e.g. after auction times were created or changed.
+
+        :return: None
+        """
+        if self.scheduler is not None:
+            self.schedule_next()
+
+    def run(self):
+        """
+        Handles due auctions and plans the following run.
+
+        :return: None
+        """
+        close_old_connections()
+        try:
+            with measure(SCHEDULER, "tick"):
+                handle_auctions()
+        except Exception:
+            _logger.exception("Failed to handle auction deadlines")
+            self._add_job(timezone.now() + RETRY_INTERVAL)
+            return
+
+        self.schedule_next()
+
+    def schedule_next(self):
+        """
+        Replaces the pending job with a new one firing at the nearest deadline.
+
+        :return: None
+        """
+        with self._lock:
+            now = timezone.now()
+            run_date = now + MAX_IDLE_INTERVAL
+            try:
+                deadline = get_next_deadline()
+            except DatabaseError:
+                _logger.exception("Failed to compute the next auction deadline")
+                deadline = now + RETRY_INTERVAL
+
+            if deadline is not None:
+                run_date = min(max(deadline, now), run_date)
+
+            self._add_job(run_date)
+
+    def _add_job(self, run_date):
+        self.scheduler.add_job(
+            self.run,
+            DateTrigger(run_date=run_date),
+            id=LIFECYCLE_JOB_ID,
+            name="Start and finish auctions",
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
+
+lifecycle_engine = AuctionLifecycleEngine()
 
 
 def start():
     """
     Initializes the scheduler and starts monitoring auction events.
-    This function sets up the scheduler to execute the handle_auctions function periodically.
+    This function sets up the lifecycle engine to execute the handle_auctions function on every auction deadline.
 
     :return: None
     """
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(handle_auctions, IntervalTrigger(seconds=1), name="Start and finish auctions", jobstore="default")
-    scheduler.start()
+    lifecycle_engine.start()
     print("Scheduler started...")
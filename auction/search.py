@@ -0,0 +1,185 @@
+"""
+Full-text search of the auctions by title and description.
+
+On PostgreSQL the auctions are matched by a weighted tsvector of the title (A) and the description (B), served by the
+GIN expression index of migration 0011, and ranked with ts_rank. Titles similar to the search text are matched too
+(pg_trgm, served by the trigram GIN index), so a typo in a title word still finds the auction. Other databases (e.g.
+SQLite in local runs) use SearchIndex, an inverted index of the auctions kept in the memory of the process.
+
+On both, every word of the search text has to match a word of the auction or the beginning of one.
+"""
+
+import re
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.db.models.signals import post_delete, post_save
+
+from auction.models import Auction
+
+AUCTION_SEARCH_CONFIG = getattr(settings, "AUCTION_SEARCH", {})
+# The text search configuration, the GIN index is built with it, so changing it requires a new index
+SEARCH_CONFIG = AUCTION_SEARCH_CONFIG.get("CONFIG", "simple")
+
+# Letters and digits, underscores separate words like in the PostgreSQL text search parser
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+
+def tokenize(text):
+    """
+    Splits a text into case-folded words.
+    """
+    return [token.casefold() for token in TOKEN_PATTERN.findall(text or "")]
+
+
+class SearchIndex:
+    """
+    Inverted index of the auction titles and descriptions, built from the database on the first search and updated by
+    the post_save and post_delete signals of the auctions saved in this process.
+    """
+
+    def __init__(self):
+        self._postings = None
+        self._documents = {}
+        self._lock = threading.Lock()
+
+    def search(self, text):
+        """
+        Finds the auctions containing every word of the text, as a word or a word prefix.
+
+        :param text: The search text.
+        :return: A list of the matching auction IDs, the ones matching in the title and matching more often first.
+        """
+        terms = set(tokenize(text))
+        if not terms:
+            return []
+
+        with self._lock:
+            if self._postings is None:
+                self._build()
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for token, postings in self._postings.items():
+                    if token.startswith(term):
+                        for auction_id, weight in postings.items():
+                            term_scores[auction_id] = term_scores.get(auction_id, 0) + weight
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        auction_id: score + term_scores[auction_id]
+                        for auction_id, score in scores.items()
+                        if auction_id in term_scores
+                    }
+                if not scores:
+                    return []
+        return sorted(scores, key=lambda auction_id: (-scores[auction_id], auction_id))
+
+    def update(self, auction_id, title, description):
+        """
+        Indexes the current title and description of an auction.
+        """
+        with self._lock:
+            if self._postings is not None:
+                self._remove(auction_id)
+                self._add(auction_id, title, description)
+
+    def remove(self, auction_id):
+        with self._lock:
+            if self._postings is not None:
+                self._remove(auction_id)
+
+    def clear(self):
+        with self._lock:
+            self._postings = None
+            self._documents.clear()
+
+    def _build(self):
+        self._postings = {}
+        self._documents.clear()
+        for auction_id, title, description in Auction.objects.values_list("id", "title", "description").iterator():
+            self._add(auction_id, title, description)
+
+    def _add(self, auction_id, title, description):
+        weights = {}
+        for token in tokenize(title):
+            weights[token] = weights.get(token, 0) + TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0) + DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            self._postings.setdefault(token, {})[auction_id] = weight
+        self._documents[auction_id] = list(weights)
+
+    def _remove(self, auction_id):
+        for token in self._documents.pop(auction_id, ()):
+            postings = self._postings[token]
+            postings.pop(auction_id, None)
+            if not postings:
+                del self._postings[token]
+
+
+search_index = SearchIndex()
+
+
+def search_auctions(queryset, text):
+    """
+    Filters an auction queryset by a search text and orders it by relevance.
+
+    :param queryset: The auction queryset.
+    :param text: The search text as entered by the user.
+    :return: The filtered queryset.
+    """
+    if connection.vendor == "postgresql":
+        return search_postgresql(queryset, text)
+
+    auction_ids = search_index.search(text)
+    if not auction_ids:
+        return queryset.none()
+    rank = Case(
+        *(When(id=auction_id, then=Value(position)) for position, auction_id in enumerate(auction_ids)),
+        output_field=IntegerField(),
+    )
+    return queryset.filter(id__in=auction_ids).order_by(rank)
+
+
+def search_postgresql(queryset, text):
+    # django.contrib.postgres imports psycopg, so it is only imported when PostgreSQL is used
+    from django.contrib.postgres.lookups import TrigramSimilar
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+    # Has to stay the expression of the auction_search_vector_idx index to use it
+    vector = SearchVector("title", weight="A", config=SEARCH_CONFIG) + SearchVector(
+        "description", weight="B", config=SEARCH_CONFIG
+    )
+    # The words only hold letters and digits, so they can not inject tsquery operators, to_tsquery normalizes them
+    terms = TOKEN_PATTERN.findall(text or "")
+    if not terms:
+        return queryset.none()
+    query = SearchQuery(" & ".join(f"{term}:*" for term in terms), config=SEARCH_CONFIG, search_type="raw")
+    return (
+        queryset.alias(search_vector=vector)
+        .annotate(
+            search_rank=SearchRank(vector, query),
+            title_similarity=TrigramSimilarity("title", text),
+        )
+        .filter(Q(search_vector=query) | Q(TrigramSimilar(F("title"), text)))
+        .order_by("-search_rank", "-title_similarity", "id")
+    )
+
+
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"title", "description"} & set(update_fields):
+        search_index.update(instance.id, instance.title, instance.description)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    search_index.remove(instance.id)
+
+
+post_save.connect(update_search_index, sender=Auction)
+post_delete.connect(remove_from_search_index, sender=Auction)
@@ -6,7 +6,7 @@ from rest_framework.exceptions import ValidationError
 
 from auction.exceptions import AuctionFinishedException, AuctionRunningException
 from auction.helpers.validators import auction_validator
-from auction.models import MIN_AUCTION_DURATION, Auction, AuctionPhoto, Bid
+from auction.models import MIN_AUCTION_DURATION, Auction, AuctionBidder, AuctionPhoto, Bid, DonorStatistics
 
 _logger = logging.getLogger(__name__)
 
@@ -61,14 +61,13 @@ class AuctionSerializer(serializers.ModelSerializer):
     leader_bid = serializers.SerializerMethodField()
 
     def get_images(self, obj):
-        images = AuctionPhoto.objects.filter(auction=obj)
+        images = obj.auctionphoto_set.all()
         return AuctionPhotoSerializer(images, many=True, read_only=True).data
 
     def get_leader_bid(self, obj):
-        leader_bid = Bid.objects.filter(auction=obj, leader=True).first()
-        if leader_bid:
-            return BidSerializer(leader_bid).data
-        return None
+        if obj.leader_bid_id is None:
+            return None
+        return BidSerializer(obj.leader_bid).data
 
     class Meta:
         model = Auction
@@ -85,10 +84,23 @@ class AuctionSerializer(serializers.ModelSerializer):
             "start_time",
             "end_time",
             "active",
-            "leader_bid"
-
+            "leader_bid",
+            "current_price",
+            "bid_count",
+            "bidder_count",
+            "updated_at",
+        ]
+        read_only_fields = [
+            "started",
+            "finished",
+            "id",
+            "author",
+            "images",
+            "current_price",
+            "bid_count",
+            "bidder_count",
+            "updated_at",
         ]
-        read_only_fields = ["started", "finished", "id", "author", "images",]
 
     def validate(self, data):
         """
@@ -120,8 +132,8 @@ class AuctionSerializer(serializers.ModelSerializer):
         instance.min_bid_price_gap = validated_data.get("min_bid_price_gap", instance.min_bid_price_gap)
         instance.start_time = validated_data.get("start_time", instance.start_time)
         instance.end_time = validated_data.get("end_time", instance.end_time)
-        instance.active = validated_data.get("active", instance.active)
-        instance.save()
+        # Only the edited fields are written, the bid summary and state fields of the instance may be stale by now
+        instance.save(update_fields=[*allowed_fields, "updated_at"])
 
         return instance
 
@@ -154,3 +166,44 @@ class BidSerializer(serializers.ModelSerializer):
         auction = validated_data.pop("auction")
         bid = Bid.objects.create(author=author, auction=auction, **validated_data)
         return bid
+
+
+class AuctionBidderSerializer(serializers.ModelSerializer):
+    author = UserSerializer(many=False, read_only=True)
+
+    class Meta:
+        model = AuctionBidder
+        fields = ["author", "bid_count", "highest_price"]
+
+
+class DonorStatisticsSerializer(serializers.ModelSerializer):
+    user = UserSerializer(many=False, read_only=True)
+
+    class Meta:
+        model = DonorStatistics
+        fields = ["user", "auction_count", "won_count", "raised_amount"]
+
+
+class AuctionStatisticsSerializer(serializers.Serializer):
+    auction_id = serializers.IntegerField()
+    bid_count = serializers.IntegerField()
+    bidder_count = serializers.IntegerField()
+    current_price = serializers.IntegerField()
+    raised_amount = serializers.IntegerField(help_text="The winner bid price of a finished auction, otherwise 0.")
+    finished = serializers.BooleanField()
+    top_bidders = AuctionBidderSerializer(many=True)
+
+
+class RunningAuctionStatisticsSerializer(serializers.Serializer):
+    auction_count = serializers.IntegerField()
+    bid_count = serializers.IntegerField()
+    pledged_amount = serializers.IntegerField(help_text="The sum of the current prices of the running auctions.")
+
+
+class CharityStatisticsSerializer(serializers.Serializer):
+    finished_auction_count = serializers.IntegerField()
+    bid_count = serializers.IntegerField(help_text="The bids of the finished auctions.")
+    raised_amount = serializers.IntegerField(help_text="The sum of the winner bids of the finished auctions.")
+    donor_count = serializers.IntegerField(help_text="The users that placed at least one bid.")
+    running = RunningAuctionStatisticsSerializer()
+    top_donors = DonorStatisticsSerializer(many=True)
@@ -1,13 +1,25 @@
 from asgiref.sync import sync_to_async
-from channels.db import database_sync_to_async
 from django.core.paginator import Paginator
-
-from auction.helpers.models import get_latest_bid_where_auction_id_async
-from auction.helpers.pagination import create_paginated_dict
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from auction.bid_book import bid_book
+from auction.cache import auction_cache
+from auction.helpers.pagination import (
+    CURSOR_PAGINATION,
+    create_cursor_paginated_dict,
+    create_paginated_dict,
+    paginate_by_cursor,
+)
 from auction.helpers.validators import auction_validator, bid_validator
 from auction.models import Auction, Bid
 from auction.serializers import BidSerializer
+from auction.statistics import statistics_service
 from authentication.service import auth_service
+from charityAuctionProject.metrics import database_sync_to_async
 from django.contrib.auth.models import User
 
 
@@ -18,10 +30,15 @@ class AsyncAuctionService:
 
     auction_validator = auction_validator
     bid_validator = bid_validator
+    bid_book = bid_book
+    auction_cache = auction_cache
+    statistics_service = statistics_service
 
     async def make_bid(self, bid, author, auction_id):
         """
         Method to make a bid in auction if all assertions is valid.
+        Bids that are invalid against the bid book are rejected without touching the database, all database work
+        of the remaining bids is done in a single call on the database thread.
         :param bid: Dictionary containing bid data.
         :param author: The user making the bid.
         :param auction_id: The ID of the auction for which the bid is made.
@@ -30,22 +47,67 @@ class AsyncAuctionService:
         """
 
         serializer = BidSerializer(data=bid)
-        await database_sync_to_async(serializer.is_valid)(raise_exception=True)
-        auction = await self.get_valid_auction(auction_id)
-        bid = await database_sync_to_async(lambda: serializer.validated_data)()
-        price = bid["price"]
-        self.bid_validator.is_price_more_then_initial(auction, price)
+        serializer.is_valid(raise_exception=True)
+        entry = self.bid_book.get(auction_id)
+        if entry is not None:
+            self.validate_bid(entry, serializer.validated_data["price"])
+        return await self.place_bid(serializer, author, auction_id)
 
-        latest_bid = await get_latest_bid_where_auction_id_async(auction.id, "price")
-        latest_price = latest_bid.price if latest_bid else 0
-        self.bid_validator.is_price_greater_than_latest(latest_price, price)
+    @database_sync_to_async
+    def place_bid(self, serializer, author, auction_id):
+        """
+        Method to validate and save a bid atomically.
+        The auction row is locked for the duration of the transaction, so concurrent bids on the same auction are
+        validated one after another against the latest accepted price and only one of them can become the leader.
+        The bid book is refreshed from the locked row afterwards, the bid statistics are updated under the lock.
+        :param serializer: The validated BidSerializer.
+        :param author: The user making the bid.
+        :param auction_id: The ID of the auction for which the bid is made.
+        :return: The created bid object, its previous_bid_id attribute is the ID of the replaced leader bid.
+        :raise: This method can raise various exceptions if bid validation fails.
+        """
 
-        price_gap = price - latest_price
-        self.bid_validator.is_great_then_gap_or_raise(auction, price_gap)
-        if latest_bid:
-            latest_bid.leader = False
-            await database_sync_to_async(latest_bid.save)()
-        return await database_sync_to_async(serializer.save)(author=author, auction=auction)
+        with transaction.atomic():
+            auction = Auction.objects.select_for_update().get(pk=auction_id)
+            try:
+                self.validate_bid(auction, serializer.validated_data["price"])
+            except APIException:
+                self.bid_book.load(auction)
+                raise
+
+            previous_price = auction.current_price
+            bid = serializer.save(author=author, auction=auction)
+            bid.previous_bid_id = auction.leader_bid_id
+            if auction.leader_bid_id is not None:
+                Bid.objects.filter(pk=auction.leader_bid_id).update(leader=False)
+            new_bidder, new_donor = self.statistics_service.record_bid(bid)
+            Auction.objects.filter(pk=auction.pk).update(
+                current_price=bid.price,
+                leader_bid=bid,
+                bid_count=F("bid_count") + 1,
+                bidder_count=F("bidder_count") + int(new_bidder),
+                updated_at=timezone.now(),
+            )
+            # Last, the charity row is shared by the bids of all auctions and stays locked until the commit
+            self.statistics_service.record_running_bid(bid.price - previous_price, new_donor)
+
+        auction.current_price = bid.price
+        self.bid_book.load(auction)
+        self.auction_cache.invalidate(auction.id)
+        return bid
+
+    def validate_bid(self, auction, price):
+        """
+        Method to check a bid price against the auction state and its current price.
+        :param auction: The auction for which the bid is made.
+        :param price: The price of the bid.
+        :raise: This method can raise various exceptions if bid validation fails.
+        """
+
+        self.auction_validator.is_valid_or_raise(auction)
+        self.bid_validator.is_price_more_then_initial(auction, price)
+        self.bid_validator.is_price_greater_than_latest(auction.current_price, price)
+        self.bid_validator.is_great_then_gap_or_raise(auction, price - auction.current_price)
 
     async def get_bids(self, auction_id, limit, offset, base_url):
         """
@@ -65,17 +127,64 @@ class AsyncAuctionService:
         ser_bids = await sync_to_async(lambda: BidSerializer(page_obj.object_list, many=True).data)()
         return create_paginated_dict(paginator, page_obj, ser_bids, limit, base_url)
 
+    @database_sync_to_async
+    def get_bids_by_cursor(self, auction_id, limit, cursor, with_count, base_url):
+        """
+        Method to get bids asynchronously using keyset pagination on (created, id).
+        :param auction_id: The ID of the auction for which bids are retrieved.
+        :param limit: The maximum number of bids per page.
+        :param cursor: The opaque cursor of the requested page or None for the first page.
+        :param with_count: Whether the total number of bids should be counted.
+        :param base_url: The base URL used for generating next and previous page URLs.
+        :return: A dictionary containing paginated bid data.
+        """
+
+        bids = Bid.objects.filter(auction_id=auction_id).select_related("author")
+        page, next_cursor, previous_cursor = paginate_by_cursor(bids, limit, cursor)
+        count = bids.count() if with_count else None
+        ser_bids = BidSerializer(page, many=True).data
+        query = f"{base_url}?pagination={CURSOR_PAGINATION}&limit={limit}" + ("" if with_count else "&count=false")
+        return create_cursor_paginated_dict(
+            ser_bids, next_cursor, previous_cursor, count, lambda page_cursor: f"{query}&cursor={page_cursor}"
+        )
+
+    @database_sync_to_async
+    def get_bids_since(self, auction_id, since_bid_id, max_bids):
+        """
+        Method to get the bids placed after a bid asynchronously, used to resume WebSocket connections.
+        :param auction_id: The ID of the auction for which bids are retrieved.
+        :param since_bid_id: The ID of the last bid the client has seen.
+        :param max_bids: The maximum number of bids returned.
+        :return: A list of serialized bids ordered by ID, or None if more than max_bids bids were placed.
+        """
+
+        bids = list(
+            Bid.objects.filter(auction_id=auction_id, id__gt=since_bid_id)
+            .select_related("author")
+            .order_by("id")[:max_bids + 1]
+        )
+        if len(bids) > max_bids:
+            return None
+        return BidSerializer(bids, many=True).data
+
     @database_sync_to_async
     def get_users_highest_bids(self, pk):
-        bids = Bid.objects.filter(auction_id=pk).order_by("-created")
-        author_ids = []
-        highest_bids = []
-        for bid in bids:
-            author_id = bid.author.id
-            if author_id not in author_ids:
-                author_ids.append(author_id)
-                highest_bids.append(BidSerializer(bid).data)
-        return highest_bids
+        """
+        Method to get the highest bid of every user of an auction asynchronously.
+        The bids are ranked per author by a window function, so a single query returns one bid per user.
+        :param pk: The ID of the auction.
+        :return: A list of serialized bids ordered by price, highest first.
+        """
+
+        author_rank = Window(RowNumber(), partition_by=F("author_id"), order_by=F("price").desc())
+        bids = (
+            Bid.objects.filter(auction_id=pk)
+            .select_related("author")
+            .annotate(author_rank=author_rank)
+            .filter(author_rank=1)
+            .order_by("-price")
+        )
+        return BidSerializer(bids, many=True).data
 
     async def get_valid_auction(self, auction_id):
         """
@@ -99,24 +208,6 @@ class AsyncAuctionService:
 
         return Auction.objects.get(pk=auction_id)
 
-    async def get_winner(self, auction_id):
-        """
-        Method to get the winner of an auction asynchronously.
-        :param auction_id: The ID of the auction for which to retrieve the winner.
-        :return: The winning bid object.
-        :raise: This method can raise an exception if the auction has no winner.
-        """
-
-        auction = await self.get_auction(auction_id)
-        self.auction_validator.is_finished_or_raise(auction)
-        winner_bid = await database_sync_to_async(
-            lambda: Bid.objects
-            .filter(auction_id=auction_id, won=True)
-            .first()
-        )()
-        self.bid_validator.is_bid_winner_or_throw(winner_bid)
-        return winner_bid
-
 
 class AsyncUserService:
     """
@@ -0,0 +1,198 @@
+"""
+Incrementally maintained bid statistics of the auctions, the donors and the charity.
+
+The bid service records every accepted bid in the AuctionBidder row of its author and auction and in the running totals
+of the charity while the auction row is locked, and the lifecycle engine moves the started and finished auctions in and
+out of the running totals, adding the finished ones to the donor and charity totals in the transaction that finishes
+them. The donors are counted when their DonorStatistics row is created and deleted. The statistics are read from these
+rows, without scanning bids or auctions.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete
+
+from auction.models import CHARITY_STATISTICS_ID, Auction, AuctionBidder, Bid, CharityStatistics, DonorStatistics
+
+AUCTION_STATISTICS_CONFIG = getattr(settings, "AUCTION_STATISTICS", {})
+
+
+class StatisticsService:
+    """
+    Service class for recording and reading the bid statistics.
+    """
+
+    def __init__(self, top_size=AUCTION_STATISTICS_CONFIG.get("TOP_SIZE", 10)):
+        """
+        :param top_size: The number of top bidders and top donors returned.
+        """
+        self.top_size = top_size
+
+    def record_bid(self, bid):
+        """
+        Adds an accepted bid to the bidder of its auction, and the auction to the donor of a new bidder.
+        Has to be called in the transaction that locked the auction row, so the bids of an auction are recorded one
+        after another and their prices only grow.
+        :param bid: The created bid.
+        :return: A tuple of two booleans, True if it is the first bid of its author in the auction (the auction
+            bidder_count has to be increased) and True if it is the first bid of its author at all.
+        """
+        updated = AuctionBidder.objects.filter(auction_id=bid.auction_id, author_id=bid.author_id).update(
+            bid_count=F("bid_count") + 1, highest_price=bid.price
+        )
+        if updated:
+            return False, False
+
+        AuctionBidder.objects.create(
+            auction_id=bid.auction_id, author_id=bid.author_id, bid_count=1, highest_price=bid.price
+        )
+        return True, self.add_donor_auction(bid.author_id)
+
+    def add_donor_auction(self, user_id):
+        """
+        :return: True if the DonorStatistics row of the user was created.
+        """
+        if DonorStatistics.objects.filter(user_id=user_id).update(auction_count=F("auction_count") + 1):
+            return False
+
+        # The first bids of a user in two auctions may race to create the row
+        _, created = DonorStatistics.objects.get_or_create(user_id=user_id, defaults={"auction_count": 1})
+        if not created:
+            DonorStatistics.objects.filter(user_id=user_id).update(auction_count=F("auction_count") + 1)
+        return created
+
+    def record_running_bid(self, price_increase, new_donor):
+        """
+        Adds an accepted bid to the running totals of the charity.
+        Has to be called last in the transaction that locked the auction row, the charity row is shared by the bids of
+        all auctions and stays locked until the transaction ends.
+        :param price_increase: The price of the bid minus the previous current price of the auction.
+        :param new_donor: True if it is the first bid of its author, as returned by record_bid.
+        """
+        fields = {
+            "running_bid_count": F("running_bid_count") + 1,
+            "pledged_amount": F("pledged_amount") + price_increase,
+        }
+        if new_donor:
+            fields["donor_count"] = F("donor_count") + 1
+        self.update_charity_statistics(**fields)
+
+    def record_started_auctions(self, count):
+        """
+        Adds started auctions to the running totals of the charity, they have no bids yet.
+        :param count: The number of auctions marked as started.
+        """
+        self.update_charity_statistics(running_auction_count=F("running_auction_count") + count)
+
+    def record_finished_auctions(self, auction_ids):
+        """
+        Moves finished auctions from the running totals to the totals of their winners and of the charity.
+        Has to be called in the transaction that finished them, after their winner bids were marked.
+        :param auction_ids: The IDs of the finished auctions.
+        """
+        winners = defaultdict(lambda: [0, 0])
+        raised_amount = 0
+        winner_bids = Bid.objects.filter(auction_id__in=auction_ids, won=True).values_list("author_id", "price")
+        for author_id, price in winner_bids:
+            winners[author_id][0] += 1
+            winners[author_id][1] += price
+            raised_amount += price
+        for author_id, (won_count, amount) in winners.items():
+            DonorStatistics.objects.filter(user_id=author_id).update(
+                won_count=F("won_count") + won_count, raised_amount=F("raised_amount") + amount
+            )
+
+        totals = Auction.objects.filter(id__in=auction_ids).aggregate(
+            bid_count=Sum("bid_count"), pledged_amount=Sum("current_price")
+        )
+        bid_count = totals["bid_count"] or 0
+        self.update_charity_statistics(
+            finished_auction_count=F("finished_auction_count") + len(auction_ids),
+            bid_count=F("bid_count") + bid_count,
+            raised_amount=F("raised_amount") + raised_amount,
+            running_auction_count=F("running_auction_count") - len(auction_ids),
+            running_bid_count=F("running_bid_count") - bid_count,
+            pledged_amount=F("pledged_amount") - (totals["pledged_amount"] or 0),
+        )
+
+    def update_charity_statistics(self, **fields):
+        if not CharityStatistics.objects.filter(pk=CHARITY_STATISTICS_ID).update(**fields):
+            CharityStatistics.objects.get_or_create(pk=CHARITY_STATISTICS_ID)
+            CharityStatistics.objects.filter(pk=CHARITY_STATISTICS_ID).update(**fields)
+
+    def get_auction_statistics(self, auction_id):
+        """
+        Returns the statistics of an auction.
+        :param auction_id: The ID of the auction.
+        :return: A dictionary of the statistics or None if the auction does not exist.
+        """
+        auction = (
+            Auction.objects.filter(pk=auction_id)
+            .values("id", "bid_count", "bidder_count", "current_price", "finished", "leader_bid_id")
+            .first()
+        )
+        if auction is None:
+            return None
+
+        top_bidders = (
+            AuctionBidder.objects.filter(auction_id=auction_id)
+            .select_related("author")
+            .order_by("-highest_price")[: self.top_size]
+        )
+        return {
+            "auction_id": auction["id"],
+            "bid_count": auction["bid_count"],
+            "bidder_count": auction["bidder_count"],
+            "current_price": auction["current_price"],
+            "raised_amount": auction["current_price"] if auction["finished"] and auction["leader_bid_id"] else 0,
+            "finished": auction["finished"],
+            "top_bidders": top_bidders,
+        }
+
+    def get_charity_statistics(self):
+        """
+        Returns the totals of the finished auctions, the totals of the running auctions and the top donors.
+        The totals are read from the charity row, the top donors from the raised amount index.
+        :return: A dictionary of the statistics.
+        """
+        charity, _ = CharityStatistics.objects.get_or_create(pk=CHARITY_STATISTICS_ID)
+        top_donors = (
+            DonorStatistics.objects.filter(raised_amount__gt=0)
+            .select_related("user")
+            .order_by("-raised_amount", "user_id")[: self.top_size]
+        )
+        return {
+            "finished_auction_count": charity.finished_auction_count,
+            "bid_count": charity.bid_count,
+            "raised_amount": charity.raised_amount,
+            "donor_count": charity.donor_count,
+            "running": {
+                "auction_count": charity.running_auction_count,
+                "bid_count": charity.running_bid_count,
+                "pledged_amount": charity.pledged_amount,
+            },
+            "top_donors": top_donors,
+        }
+
+
+statistics_service = StatisticsService()
+
+
+def remove_donor(sender, instance, **kwargs):
+    statistics_service.update_charity_statistics(donor_count=F("donor_count") - 1)
+
+
+def remove_running_auction(sender, instance, **kwargs):
+    if instance.started and not instance.finished:
+        statistics_service.update_charity_statistics(
+            running_auction_count=F("running_auction_count") - 1,
+            running_bid_count=F("running_bid_count") - instance.bid_count,
+            pledged_amount=F("pledged_amount") - instance.current_price,
+        )
+
+
+# The donor rows are deleted with their users
+post_delete.connect(remove_donor, sender=DonorStatistics)
+post_delete.connect(remove_running_auction, sender=Auction)
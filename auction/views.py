@@ -1,17 +1,37 @@
 from django.contrib.auth.models import User
 from django.db.models import Max
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from auction.filters import AuctionFilter
+from auction.bid_book import bid_book
+from auction.cache import auction_cache
+from auction.filters import AuctionFilter, AuctionSearchFilter
+from auction.helpers.http import create_etag, get_not_modified_response, set_validators
+from auction.helpers.pagination import (
+    CURSOR_PAGINATION,
+    create_cursor_paginated_dict,
+    is_count_requested,
+    paginate_by_cursor,
+)
 from auction.helpers.validators import auction_validator, bid_validator
 from auction.models import Auction, AuctionPhoto, Bid
-from auction.serializers import AuctionPhotoSerializer, AuctionSerializer, BidSerializer
+from auction.scheduler.scheduler import lifecycle_engine
+from auction.serializers import (
+    AuctionPhotoSerializer,
+    AuctionSerializer,
+    AuctionStatisticsSerializer,
+    BidSerializer,
+    CharityStatisticsSerializer,
+)
+from auction.statistics import statistics_service
 from charityAuctionProject.permissions import IsAuctionAuthorOrReadOnly, IsAuthorOrReadAndCreateOnly
 
 
@@ -26,15 +46,19 @@ class AuctionViewSet(viewsets.ModelViewSet):
         deactivate: Deactivate auction
         get_winner_bid: Get winner of the auction
         get_bids: Get bids of the auction
+        get_statistics: Get bid statistics of the auction
+        get_charity_statistics: Get totals of all auctions and the top donors
     """
 
-    queryset = Auction.objects.all()
+    queryset = Auction.objects.select_related("author", "leader_bid__author").prefetch_related("auctionphoto_set")
     serializer_class = AuctionSerializer
     validator = auction_validator
     bid_validator = bid_validator
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadAndCreateOnly)
+    auction_cache = auction_cache
+    statistics_service = statistics_service
 
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, AuctionSearchFilter, OrderingFilter]
     ordering_fields = [
         "title",
         "initial_price",
@@ -44,6 +68,7 @@ class AuctionViewSet(viewsets.ModelViewSet):
     ]
     search_fields = [
         "title",
+        "description",
     ]
     filterset_class = AuctionFilter
 
@@ -58,7 +83,9 @@ class AuctionViewSet(viewsets.ModelViewSet):
         auction = self.get_object()
         self.validator.is_not_finished_or_raise(auction)
         auction.active = True
-        auction.save()
+        auction.save(update_fields=["active", "updated_at"])
+        bid_book.discard(auction.id)
+        self.auction_cache.invalidate(auction.id, lists=True)
         return Response(self.get_serializer(auction).data)
 
     @extend_schema(
@@ -72,7 +99,9 @@ class AuctionViewSet(viewsets.ModelViewSet):
         auction = self.get_object()
         self.validator.is_not_finished_or_raise(auction)
         auction.active = False
-        auction.save()
+        auction.save(update_fields=["active", "updated_at"])
+        bid_book.discard(auction.id)
+        self.auction_cache.invalidate(auction.id, lists=True)
         return Response(self.get_serializer(auction).data)
 
     @action(detail=True, name="Winner bid of auction", url_path="winner")
@@ -84,6 +113,20 @@ class AuctionViewSet(viewsets.ModelViewSet):
         serializer = BidSerializer(winner_bid)
         return Response(serializer.data)
 
+    @extend_schema(responses={200: AuctionStatisticsSerializer()})
+    @action(detail=True, name="Statistics of auction", url_path="stats")
+    def get_statistics(self, request, pk=None):
+        statistics = self.statistics_service.get_auction_statistics(pk) if str(pk).isdigit() else None
+        if statistics is None:
+            raise NotFound()
+        return Response(AuctionStatisticsSerializer(statistics).data)
+
+    @extend_schema(operation_id="auctions_stats_all_retrieve", responses={200: CharityStatisticsSerializer()})
+    @action(detail=False, name="Statistics of all auctions", url_path="stats")
+    def get_charity_statistics(self, request):
+        statistics = self.statistics_service.get_charity_statistics()
+        return Response(CharityStatisticsSerializer(statistics).data)
+
     @extend_schema(
         responses={
             200: AuctionSerializer(),
@@ -93,12 +136,78 @@ class AuctionViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         auction = self.get_object()
         self.validator.is_not_started_or_raise(auction)
-        super().update(request, *args, **kwargs)
+        response = super().update(request, *args, **kwargs)
+        lifecycle_engine.wake()
+        return response
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.auction_cache.invalidate(serializer.instance.id, lists=True)
+
+    def perform_destroy(self, instance):
+        auction_id = instance.id
+        super().perform_destroy(instance)
+        self.auction_cache.invalidate(auction_id, lists=True)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Returns a page of auctions, served from the auction cache while none of its auctions changed.
+        """
+        url = request.build_absolute_uri()
+        data, state = self.auction_cache.get_list(url)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if state is not None:
+            auctions = response.data["results"] if isinstance(response.data, dict) else response.data
+            self.auction_cache.set_list(url, state, [auction["id"] for auction in auctions], response.data)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns an auction, served from the auction cache while it did not change.
+        Conditional requests with a current ETag get 304 Not Modified after a single lookup of the auction version.
+        """
+        if not str(kwargs["pk"]).isdigit():
+            return super().retrieve(request, *args, **kwargs)
+
+        auction_id = int(kwargs["pk"])
+        validators = self.get_validators(request, auction_id)
+        if validators is None:
+            return super().retrieve(request, *args, **kwargs)
+        not_modified = get_not_modified_response(request, validators[0])
+        if not_modified is not None:
+            return not_modified
+
+        url = request.build_absolute_uri()
+        data, version = self.auction_cache.get_detail(auction_id, url)
+        if data is not None:
+            return set_validators(Response(data), *validators)
+
+        response = super().retrieve(request, *args, **kwargs)
+        if version is not None:
+            self.auction_cache.set_detail(auction_id, version, url, response.data)
+        return set_validators(response, *validators)
+
+    def get_validators(self, request, auction_id):
+        """
+        Returns the ETag and the last modification time of an auction and its bids.
+        The version is read before the response is built, so a response is never tagged newer than it is.
+        :param request: The request.
+        :param auction_id: The ID of the auction.
+        :return: A tuple of the ETag and updated_at, or None if the auction does not exist.
+        """
+        version = Auction.objects.filter(pk=auction_id).values_list("updated_at", "leader_bid_id", "bid_count").first()
+        if version is None:
+            return None
+        updated_at, leader_bid_id, bid_count = version
+        return create_etag(request, auction_id, updated_at.timestamp(), leader_bid_id, bid_count), updated_at
 
     def destroy(self, request, *args, **kwargs):
         auction = self.get_object()
         self.validator.is_not_started_or_raise(auction)
-        super().destroy(request, *args, **kwargs)
+        return super().destroy(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -106,12 +215,27 @@ class AuctionViewSet(viewsets.ModelViewSet):
         author_username = request.user
         author = User.objects.get(username=author_username)
         serializer.save(author=author)
+        self.auction_cache.invalidate(lists=True)
+        lifecycle_engine.wake()
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=True, url_path="bids", name="get bids by auction id")
     def get_bids(self, request, pk):
-        bids = Bid.objects.filter(auction_id=pk).order_by("-created")
+        validators = self.get_validators(request, pk) if str(pk).isdigit() else None
+        if validators is not None:
+            not_modified = get_not_modified_response(request, validators[0])
+            if not_modified is not None:
+                return not_modified
+            return set_validators(self.list_bids(request, pk), *validators)
+        return self.list_bids(request, pk)
+
+    def list_bids(self, request, pk):
+        bids = Bid.objects.filter(auction_id=pk).select_related("author")
+        if request.query_params.get("pagination") == CURSOR_PAGINATION:
+            return self.get_cursor_paginated_bids(request, bids)
+
+        bids = bids.order_by("-created")
         page = self.paginate_queryset(bids)
         if page is not None:
             serializer = BidSerializer(page, many=True)
@@ -120,6 +244,24 @@ class AuctionViewSet(viewsets.ModelViewSet):
         serializer = BidSerializer(bids, many=True)
         return Response(serializer.data)
 
+    def get_cursor_paginated_bids(self, request, bids):
+        """
+        Returns a page of bids using keyset pagination on (created, id).
+        Query parameters: "limit", "cursor" taken from the "next"/"previous" links and "count=false" to skip counting.
+        """
+        limit = self.paginator.get_limit(request)
+        page, next_cursor, previous_cursor = paginate_by_cursor(bids, limit, request.query_params.get("cursor"))
+        count = bids.count() if is_count_requested(request.query_params.get("count")) else None
+        url = request.build_absolute_uri()
+        data = create_cursor_paginated_dict(
+            BidSerializer(page, many=True).data,
+            next_cursor,
+            previous_cursor,
+            count,
+            lambda cursor: replace_query_param(url, "cursor", cursor),
+        )
+        return Response(data)
+
 
 class BidViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -130,6 +272,24 @@ class BidViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = BidSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Returns a bid. Conditional requests with a current ETag get 304 Not Modified after a single lookup.
+        A bid only changes when it loses the lead or wins, which both change the auction as well.
+        """
+        version = None
+        if str(kwargs["pk"]).isdigit():
+            version = Bid.objects.filter(pk=kwargs["pk"]).values_list("leader", "won", "auction__updated_at").first()
+        if version is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        leader, won, updated_at = version
+        etag = create_etag(request, kwargs["pk"], int(leader), int(won), updated_at.timestamp())
+        not_modified = get_not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, updated_at)
+
 
 class AuctionPhotoViewSet(viewsets.ModelViewSet):
     """
@@ -139,3 +299,25 @@ class AuctionPhotoViewSet(viewsets.ModelViewSet):
     queryset = AuctionPhoto.objects.all()
     serializer_class = AuctionPhotoSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuctionAuthorOrReadOnly]
+    auction_cache = auction_cache
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.touch_auctions(serializer.instance.auction_id)
+
+    def perform_update(self, serializer):
+        previous_auction_id = serializer.instance.auction_id
+        super().perform_update(serializer)
+        self.touch_auctions(previous_auction_id, serializer.instance.auction_id)
+
+    def perform_destroy(self, instance):
+        auction_id = instance.auction_id
+        super().perform_destroy(instance)
+        self.touch_auctions(auction_id)
+
+    def touch_auctions(self, *auction_ids):
+        """
+        Marks the auctions whose photos changed as updated and invalidates their cached responses.
+        """
+        Auction.objects.filter(pk__in=auction_ids).update(updated_at=timezone.now())
+        self.auction_cache.invalidate(*auction_ids)
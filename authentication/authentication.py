@@ -0,0 +1,28 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from authentication.service import auth_service
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves tokens through the cached AuthService, so repeated requests with the same token
+    skip the signature verification and the user query.
+    """
+
+    auth_service = auth_service
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        authenticated = self.auth_service.authenticate_token(raw_token.decode())
+        if authenticated is None:
+            # Let simplejwt raise the appropriate authentication error
+            return super().authenticate(request)
+
+        return authenticated
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenUserCache:
+    """
+    Bounded LRU cache of JWT access tokens to the field values of their resolved users.
+
+    An entry expires after the configured TTL or when its token expires, whichever comes first, so a deleted or
+    deactivated user keeps access for at most the TTL.
+    """
+
+    def __init__(self, max_size, ttl):
+        """
+        :param max_size: Maximum number of cached tokens, 0 disables the cache.
+        :param ttl: Maximum lifetime of an entry in seconds.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """
+        Returns the cached value of a token.
+
+        :param token: The raw JWT access token.
+        :return: The cached value or None if the token is unknown or its entry has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+
+            self._entries.move_to_end(token)
+            return value
+
+    def set(self, token, value, token_expires_at):
+        """
+        Caches the value of a token, evicting the least recently used entry when the cache is full.
+
+        :param token: The raw JWT access token.
+        :param value: The value to cache.
+        :param token_expires_at: Expiration time of the token as a UNIX timestamp.
+        """
+        if self.max_size <= 0:
+            return
+
+        expires_at = min(time.time() + self.ttl, token_expires_at)
+        with self._lock:
+            self._entries[token] = (value, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -2,6 +2,9 @@ from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+
+from authentication.service import auth_service
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -37,3 +40,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ("id", "username", "password", "email", "first_name", "last_name")
         extra_kwargs = {"first_name": {"required": False}, "last_name": {"required": False}}
         read_only_fields = ["id"]
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair serializer adding the user claims used by the stateless token mode (see AuthService).
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        return auth_service.add_user_claims(super().get_token(user), user)
@@ -1,12 +1,32 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
 from rest_framework_simplejwt.tokens import AccessToken
 
+from authentication.cache import TokenUserCache
+
+USER_CACHE_CONFIG = getattr(settings, "AUTH_USER_CACHE", {})
+STATELESS_TOKENS = getattr(settings, "AUTH_STATELESS_TOKENS", False)
+# User fields carried by the access tokens, enough for the consumers and UserSerializer
+USER_CLAIMS = ("username", "email")
+
 
 class AuthService:
     """
     Service class for handling authentication related operations.
+    Resolved users are cached per token, the cache is shared by the REST authentication and the WebSocket consumers.
+    It keeps the field values of the users, every lookup gets its own User instance, as instances are mutable and the
+    requests and consumers using them run on different threads.
     """
 
+    def __init__(self, stateless_tokens=STATELESS_TOKENS):
+        """
+        :param stateless_tokens: If True, users are built from the token claims instead of being loaded from the
+            database. Fields missing from the claims are loaded on first access.
+        """
+        self.stateless_tokens = stateless_tokens
+        self.user_cache = TokenUserCache(USER_CACHE_CONFIG.get("MAX_SIZE", 1024), USER_CACHE_CONFIG.get("TTL", 60))
+
     def header_to_user(self, headers):
         """
         Extracts the user from the JWT token obtained from the request headers.
@@ -21,12 +41,77 @@ class AuthService:
             return None
 
     def token_to_user(self, token):
+        """
+        Resolves the user of a JWT access token.
+        :param token: The raw JWT access token.
+        :return: The user object if the token is valid and the user is active, None otherwise.
+        """
+        authenticated = self.authenticate_token(token)
+        return authenticated[0] if authenticated else None
+
+    def authenticate_token(self, token):
+        """
+        Verifies a JWT access token and resolves its user, using the token cache when possible.
+        :param token: The raw JWT access token.
+        :return: A tuple of the user and the validated AccessToken, or None if authentication fails.
+        """
+        cached = self.user_cache.get(token)
+        if cached is not None:
+            field_names, values, access_token = cached
+            return User.from_db(DEFAULT_DB_ALIAS, field_names, values), access_token
+
         try:
             access_token = AccessToken(token)
-            user_payload = access_token.payload
-            id = user_payload.get('user_id')
-            return User.objects.get(pk=id)
-        except:
+            if self.stateless_tokens and self.has_user_claims(access_token):
+                user = self.claims_to_user(access_token)
+            else:
+                user = User.objects.get(pk=access_token.payload.get('user_id'))
+                if not user.is_active:
+                    return None
+        except Exception:
+            return None
+
+        # Only the loaded fields, the deferred fields of a user built from claims stay deferred
+        field_names = tuple(field.attname for field in User._meta.concrete_fields if field.attname in user.__dict__)
+        values = tuple(user.__dict__[name] for name in field_names)
+        self.user_cache.set(token, (field_names, values, access_token), access_token['exp'])
+        return user, access_token
+
+    def add_user_claims(self, token, user):
+        """
+        Adds the user fields needed to build the user without a database query to a token.
+        Access tokens created from the given refresh token inherit the claims.
+        :param token: A simplejwt token, e.g. RefreshToken.for_user(user).
+        :param user: The user the token is issued for.
+        :return: The same token.
+        """
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+    def has_user_claims(self, access_token):
+        return all(claim in access_token.payload for claim in USER_CLAIMS)
+
+    def claims_to_user(self, access_token):
+        """
+        Builds a lightweight user from a verified token. The instance behaves like one loaded with only(), so other
+        fields (e.g. is_staff) are fetched from the database when they are first accessed.
+        :param access_token: The verified AccessToken carrying the user claims.
+        :return: The user object.
+        """
+        user_id = User._meta.pk.to_python(access_token.payload['user_id'])
+        values = [user_id] + [access_token.payload[claim] for claim in USER_CLAIMS]
+        return User.from_db(DEFAULT_DB_ALIAS, ('id',) + USER_CLAIMS, values)
+
+    def get_token_expiry(self, token):
+        """
+        Reads the expiration time of a token without verifying it again.
+        :param token: The raw JWT access token, already verified by token_to_user.
+        :return: The expiration time as a UNIX timestamp or None if the token can not be decoded.
+        """
+        try:
+            return AccessToken(token, verify=False)['exp']
+        except Exception:
             return None
 
 
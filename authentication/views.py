@@ -24,7 +24,7 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = auth_service.add_user_claims(RefreshToken.for_user(user), user)
             user_data = UserSerializer(user).data
             return Response({
                 'access': str(refresh.access_token),
@@ -0,0 +1,59 @@
+"""
+Project-wide JSON encoding used by the WebSocket consumers, the error helpers and the REST renderer.
+
+orjson is used when it is installed and enabled by the JSON_BACKEND setting, the standard library json module
+otherwise. Both backends fall back to DRF's JSONEncoder for types they do not know (Decimal, lazy strings, ...).
+"""
+
+import json
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_BACKEND = "orjson"
+STDLIB_BACKEND = "json"
+
+_encoder = JSONEncoder()
+_use_orjson = orjson is not None and getattr(settings, "JSON_BACKEND", ORJSON_BACKEND) == ORJSON_BACKEND
+
+
+def dumps_bytes(data):
+    """
+    Serializes data to UTF-8 encoded JSON.
+
+    :param data: The data to serialize.
+    :return: The JSON document as bytes.
+    """
+    if _use_orjson:
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS)
+    return dumps(data).encode()
+
+
+def dumps(data):
+    """
+    Serializes data to a JSON string.
+
+    :param data: The data to serialize.
+    :return: The JSON document as str.
+    """
+    if _use_orjson:
+        return dumps_bytes(data).decode()
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data):
+    """
+    Parses a JSON document.
+
+    :param data: The JSON document as str or bytes.
+    :return: The parsed data.
+    :raises json.JSONDecodeError: If the document is not valid JSON.
+    """
+    if _use_orjson:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,393 @@
+"""
+In-process metrics of the REST endpoints, the WebSocket messages and the scheduler ticks.
+
+Every measured operation records its wall time, the number of SQL queries it ran, the time its
+database_sync_to_async calls waited for the database thread and spent executing there, and the size of its payload.
+The totals are exposed in the Prometheus text format by MetricsView to admin users and to scrapers sending
+METRICS["TOKEN"], operations slower than METRICS["SLOW_OPERATION_MS"] are logged as warnings.
+"""
+
+import functools
+import hmac
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+METRICS_CONFIG = getattr(settings, "METRICS", {})
+METRICS_ENABLED = METRICS_CONFIG.get("ENABLED", True)
+SLOW_OPERATION_MS = METRICS_CONFIG.get("SLOW_OPERATION_MS")
+METRICS_TOKEN = METRICS_CONFIG.get("TOKEN")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REST = "rest"
+WEBSOCKET = "websocket"
+SCHEDULER = "scheduler"
+
+_logger = logging.getLogger(__name__)
+_current_operation = ContextVar("current_operation", default=None)
+_submitted_at = ContextVar("database_sync_to_async_submitted_at", default=None)
+
+
+class Operation:
+    """
+    Measurements of a single operation, shared with the threads it runs database work on.
+    """
+
+    __slots__ = ("kind", "name", "queries", "db_queue_time", "db_exec_time", "payload_bytes")
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.queries = 0
+        self.db_queue_time = 0.0
+        self.db_exec_time = 0.0
+        self.payload_bytes = 0
+
+
+class OperationStats:
+    """
+    Totals of the operations of one kind and name.
+    """
+
+    __slots__ = ("count", "time", "max_time", "queries", "db_queue_time", "db_exec_time", "payload_bytes")
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.max_time = 0.0
+        self.queries = 0
+        self.db_queue_time = 0.0
+        self.db_exec_time = 0.0
+        self.payload_bytes = 0
+
+    def add(self, operation, duration):
+        self.count += 1
+        self.time += duration
+        self.max_time = max(self.max_time, duration)
+        self.queries += operation.queries
+        self.db_queue_time += operation.db_queue_time
+        self.db_exec_time += operation.db_exec_time
+        self.payload_bytes += operation.payload_bytes
+
+
+class MetricsRegistry:
+    """
+    Thread-safe totals of the measured operations of this process.
+    """
+
+    # Metric name, help text, type and the OperationStats attribute it is read from
+    OPERATION_METRICS = (
+        ("auction_operation_seconds_count", "Number of operations.", "counter", "count"),
+        ("auction_operation_seconds_sum", "Total wall time of the operations.", "counter", "time"),
+        ("auction_operation_max_seconds", "Longest wall time of an operation.", "gauge", "max_time"),
+        ("auction_operation_queries_total", "SQL queries run by the operations.", "counter", "queries"),
+        (
+            "auction_operation_db_queue_seconds_total",
+            "Time database_sync_to_async calls waited for the database thread.",
+            "counter",
+            "db_queue_time",
+        ),
+        (
+            "auction_operation_db_exec_seconds_total",
+            "Time database_sync_to_async calls ran on the database thread.",
+            "counter",
+            "db_exec_time",
+        ),
+        ("auction_operation_payload_bytes_total", "Bytes sent by the operations.", "counter", "payload_bytes"),
+    )
+
+    def __init__(self):
+        self._stats = {}
+        self._descriptions = {}
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def describe(self, metric, help_text, metric_type="counter"):
+        """
+        Registers a labelled counter or gauge updated with increment.
+
+        :param metric: The metric name.
+        :param help_text: The HELP text of the metric.
+        :param metric_type: "counter" or "gauge".
+        """
+        with self._lock:
+            self._descriptions[metric] = (help_text, metric_type)
+            self._series.setdefault(metric, {})
+
+    def increment(self, metric, value=1, **labels):
+        """
+        Adds a value to a series of a described metric. Gauge series that drop to 0 are removed.
+
+        :param metric: The metric name.
+        :param value: The value to add, negative values decrease gauges.
+        :param labels: The labels of the series.
+        :return: The new value of the series, None if the metrics are disabled.
+        """
+        if not METRICS_ENABLED:
+            return None
+
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series[metric]
+            total = series.get(key, 0) + value
+            if total == 0 and self._descriptions[metric][1] == "gauge":
+                series.pop(key, None)
+            else:
+                series[key] = total
+        return total
+
+    def remove(self, metrics, **labels):
+        """
+        Removes the series of described metrics that have the given labels, e.g. the series of a finished auction.
+
+        :param metrics: The metric names.
+        :param labels: The labels the removed series have, among others.
+        """
+        labels = set(labels.items())
+        with self._lock:
+            for metric in metrics:
+                series = self._series[metric]
+                for key in [key for key in series if labels <= set(key)]:
+                    del series[key]
+
+    def get(self, metric, **labels):
+        with self._lock:
+            return self._series[metric].get(tuple(sorted(labels.items())), 0)
+
+    def record(self, operation, duration):
+        """
+        Adds a finished operation to the totals of its kind and name.
+
+        :param operation: The Operation.
+        :param duration: The wall time of the operation in seconds.
+        """
+        with self._lock:
+            stats = self._stats.get((operation.kind, operation.name))
+            if stats is None:
+                stats = self._stats[(operation.kind, operation.name)] = OperationStats()
+            stats.add(operation, duration)
+
+    def render(self):
+        """
+        Renders the totals in the Prometheus text exposition format.
+
+        :return: The metrics text.
+        """
+        with self._lock:
+            stats = sorted(self._stats.items())
+            lines = []
+            for metric, help_text, metric_type, attribute in self.OPERATION_METRICS:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {metric_type}")
+                for (kind, name), operation_stats in stats:
+                    labels = f'kind="{kind}",name="{escape_label(name)}"'
+                    lines.append(f"{metric}{{{labels}}} {getattr(operation_stats, attribute)}")
+            for metric, (help_text, metric_type) in sorted(self._descriptions.items()):
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {metric_type}")
+                for key, value in sorted(self._series[metric].items()):
+                    labels = ",".join(f'{name}="{escape_label(str(label))}"' for name, label in key)
+                    lines.append(f"{metric}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            for series in self._series.values():
+                series.clear()
+
+
+registry = MetricsRegistry()
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@contextmanager
+def measure(kind, name):
+    """
+    Measures the operation run inside the block, including the database work it does on other threads.
+
+    :param kind: REST, WEBSOCKET or SCHEDULER.
+    :param name: The name of the operation, e.g. the endpoint or the message type.
+    :return: A context manager yielding the Operation, or None if the metrics are disabled.
+    """
+    if not METRICS_ENABLED:
+        yield None
+        return
+
+    operation = Operation(kind, name)
+    token = _current_operation.set(operation)
+    started = time.perf_counter()
+    try:
+        yield operation
+    finally:
+        duration = time.perf_counter() - started
+        _current_operation.reset(token)
+        registry.record(operation, duration)
+        if SLOW_OPERATION_MS is not None and duration * 1000 >= SLOW_OPERATION_MS:
+            _logger.warning(
+                "Slow %s operation %s: %.1f ms, %d queries, db queue %.1f ms, db exec %.1f ms, %d bytes",
+                kind,
+                name,
+                duration * 1000,
+                operation.queries,
+                operation.db_queue_time * 1000,
+                operation.db_exec_time * 1000,
+                operation.payload_bytes,
+            )
+
+
+def measured(kind, name):
+    """
+    Decorator measuring every call of a coroutine function as an operation (see measure).
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with measure(kind, name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def add_payload(data):
+    """
+    Adds the size of sent data to the current operation.
+
+    :param data: The sent str (counted as UTF-8) or bytes.
+    """
+    operation = _current_operation.get()
+    if operation is not None and data is not None:
+        operation.payload_bytes += len(data.encode() if isinstance(data, str) else data)
+
+
+def count_query(execute, sql, params, many, context):
+    operation = _current_operation.get()
+    if operation is not None:
+        operation.queries += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class MeasuredDatabaseSyncToAsync(DatabaseSyncToAsync):
+    """
+    database_sync_to_async that adds the time a call waited for the database thread and the time it ran there to the
+    current operation.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__(self.measure_execution(func), *args, **kwargs)
+
+    async def __call__(self, *args, **kwargs):
+        token = _submitted_at.set(time.perf_counter())
+        try:
+            return await super().__call__(*args, **kwargs)
+        finally:
+            _submitted_at.reset(token)
+
+    @staticmethod
+    def measure_execution(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Runs on the database thread in a copy of the caller's context
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                operation = _current_operation.get()
+                submitted_at = _submitted_at.get()
+                if operation is not None and submitted_at is not None:
+                    operation.db_queue_time += started - submitted_at
+                    operation.db_exec_time += time.perf_counter() - started
+
+        return wrapper
+
+
+# The class is TitleCased like channels' database_sync_to_async, which it replaces
+database_sync_to_async = MeasuredDatabaseSyncToAsync
+
+
+class MetricsMiddleware:
+    """
+    Measures every request as a REST operation named after its method and URL pattern name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with measure(REST, request.method) as operation:
+            response = self.get_response(request)
+            if operation is not None:
+                match = request.resolver_match
+                operation.name = f"{request.method} {match.view_name if match else 'unmatched'}"
+                if not response.streaming:
+                    operation.payload_bytes += len(response.content)
+        return response
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates scrapers sending METRICS["TOKEN"] as a bearer token, other requests are left to the JWT
+    authentication.
+    """
+
+    def authenticate(self, request):
+        if not METRICS_TOKEN:
+            return None
+
+        header = get_authorization_header(request).split()
+        if len(header) != 2 or header[0].lower() != b"bearer":
+            return None
+        if not hmac.compare_digest(header[1], METRICS_TOKEN.encode()):
+            return None
+        return AnonymousUser(), METRICS_TOKEN
+
+    def authenticate_header(self, request):
+        return "Bearer"
+
+
+class HasMetricsToken(BasePermission):
+    def has_permission(self, request, view):
+        return bool(METRICS_TOKEN) and request.auth == METRICS_TOKEN
+
+
+class MetricsView(APIView):
+    """
+    Returns the metrics of this process in the Prometheus text format, to admin users and metrics token holders.
+    """
+
+    authentication_classes = [MetricsTokenAuthentication, *api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    permission_classes = [HasMetricsToken | IsAdminUser]
+    schema = None
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+if METRICS_ENABLED:
+    connection_created.connect(install_query_counter)
+    for existing_connection in connections.all(initialized_only=True):
+        install_query_counter(existing_connection)
@@ -0,0 +1,19 @@
+from rest_framework.renderers import JSONRenderer
+
+from charityAuctionProject import encoding
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using the project-wide encoding (orjson when available).
+    Indented output, e.g. for the browsable API, is still rendered by DRF's JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return encoding.dumps_bytes(data)
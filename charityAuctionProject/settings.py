@@ -1,4 +1,5 @@
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -92,6 +93,7 @@ CHANNEL_LAYERS = {
 }
 
 MIDDLEWARE = [
+    "charityAuctionProject.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -107,9 +109,9 @@ ROOT_URLCONF = "charityAuctionProject.urls"
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
-    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("authentication.authentication.CachedJWTAuthentication",),
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "charityAuctionProject.renderers.FastJSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -140,7 +142,8 @@ TEMPLATES = [
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        # DB_ENGINE=django.db.backends.sqlite3 with DB_NAME=<path> runs locally without PostgreSQL, e.g. for loadtest
+        "ENGINE": CONFIG.get("DB_ENGINE") or "django.db.backends.postgresql",
         "NAME": CONFIG["DB_NAME"],
         "USER": CONFIG["DB_USER"],
         "PASSWORD": CONFIG["DB_PASSWORD"],
@@ -210,7 +213,7 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=5),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "authentication.serializers.UserClaimsTokenObtainPairSerializer",
     "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
@@ -218,6 +221,86 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
 
+# JSON encoding of the REST and WebSocket payloads: "orjson" (used when installed) or "json"
+JSON_BACKEND = "orjson"
+
+# Cache of access token -> user shared by the REST authentication and the WebSocket consumers.
+# Entries live for at most TTL seconds (or until the token expires), MAX_SIZE = 0 disables the cache.
+AUTH_USER_CACHE = {
+    "MAX_SIZE": 1024,
+    "TTL": 60,
+}
+
+# Build the authenticated user from the id/username/email claims of the access token instead of loading it from the
+# database. Other user fields are loaded on first access. Deactivating a user does not revoke issued tokens then.
+AUTH_STATELESS_TOKENS = False
+
+# The auction lifecycle engine is started with the application, except in test runs, where it would start and finish
+# the auctions of the configured database before the test database is set up.
+AUCTION_SCHEDULER_AUTOSTART = "pytest" not in sys.modules and sys.argv[1:2] != ["test"]
+
+# Per process buffer of the latest bids of every auction, used to resume WebSocket clients that reconnect with
+# since_bid_id. Resumes the buffer can not answer load at most MAX_RESUME_BIDS bids from the database, clients that
+# missed more are asked to resync.
+AUCTION_REPLAY_BUFFER = {
+    "SIZE": 200,
+    "MAX_AUCTIONS": 1024,
+    "MAX_RESUME_BIDS": 500,
+}
+
+# Bids of an auction accepted by one process within this window (in milliseconds, e.g. 50-100) are broadcast as one
+# {"bids": [...], "leader": {...}} frame instead of one frame per bid. 0 disables coalescing.
+AUCTION_BROADCAST_COALESCE_MS = 0
+
+# What the WebSocket consumers do with bids that waited longer than MAX_LAG_MS in their channel layer inbox, i.e. for
+# clients that can not keep up: "none" sends every bid, "latest" skips the bid if a newer one is already broadcast,
+# so a lagging client gets the latest leader instead of every intermediate bid.
+AUCTION_BACKPRESSURE = {
+    "POLICY": "none",
+    "MAX_LAG_MS": 1000,
+}
+
+# Cache of the serialized auction detail and list responses. The local memory cache is only correct with a single
+# server process, as the responses are invalidated in the cache of the process that changed the auction. Use a shared
+# cache (e.g. the Redis cache below) with several processes.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # "default": {
+    #     "BACKEND": "django.core.cache.backends.redis.RedisCache",
+    #     "LOCATION": f"redis://{CONFIG['REDIS_HOST']}:{CONFIG['REDIS_PORT']}/1",
+    # },
+}
+
+# ALIAS is the CACHES entry used for the auction responses, TIMEOUT their lifetime in seconds
+AUCTION_CACHE = {
+    "ENABLED": True,
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Full-text search of the auctions (the search query parameter). CONFIG is the PostgreSQL text search configuration,
+# the GIN index of migration 0011 is built with "simple", so another configuration needs a new index.
+AUCTION_SEARCH = {
+    "CONFIG": "simple",
+}
+
+# Statistics endpoints /api/v1/auctions/stats/ and /api/v1/auctions/<id>/stats/, TOP_SIZE is the number of top donors
+# and top bidders they return
+AUCTION_STATISTICS = {
+    "TOP_SIZE": 10,
+}
+
+# Per process metrics of the REST endpoints, WebSocket messages and scheduler ticks, exposed at /api/v1/metrics in the
+# Prometheus text format. Operations slower than SLOW_OPERATION_MS are logged as warnings, None disables the warnings.
+# The metrics are served to admin users and to scrapers sending TOKEN as a bearer token, None allows admin users only.
+METRICS = {
+    "ENABLED": True,
+    "SLOW_OPERATION_MS": 500,
+    "TOKEN": CONFIG.get("METRICS_TOKEN") or None,
+}
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
@@ -265,6 +348,7 @@ SCHEDULER_AUTOSTART = True
 # Internationalization
 LANGUAGE_CODE = "en-us"
 
+# The date part indexes of migration 0015 are built for this time zone, changing it requires new indexes
 TIME_ZONE = "Europe/Kiev"
 
 USE_I18N = True
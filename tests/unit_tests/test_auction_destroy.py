@@ -0,0 +1,20 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from auction.models import Auction
+from tests.unit_tests.utils import create_running_auction, create_user
+
+
+class AuctionDestroyTest(TestCase):
+    def test_author_deletes_pending_auction(self):
+        author = create_user("author")
+        auction = create_running_auction(author, started=False)
+        client = APIClient()
+        client.force_authenticate(author)
+
+        response = client.delete(reverse("auction-detail", args=[auction.pk]))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Auction.objects.filter(pk=auction.pk).exists())
+        self.assertEqual(client.get(reverse("auction-detail", args=[auction.pk])).status_code, 404)
@@ -0,0 +1,32 @@
+from datetime import datetime
+
+from django.test import TestCase
+
+from auction.filters import AuctionFilter
+from auction.models import Auction
+from tests.unit_tests.utils import create_running_auction, create_user
+
+
+class DatePartFilterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        cls.morning = create_running_auction(
+            author, start_time=datetime(2026, 3, 5, 9, 15), end_time=datetime(2026, 3, 6, 9, 15)
+        )
+        cls.evening = create_running_auction(
+            author, start_time=datetime(2026, 7, 20, 21, 45), end_time=datetime(2027, 7, 21, 21, 45)
+        )
+
+    def filter(self, **params):
+        return set(AuctionFilter(params, queryset=Auction.objects.all()).qs)
+
+    def test_date_parts_compare_the_stored_time(self):
+        self.assertEqual(self.filter(start_time__hour__gt="20"), {self.evening})
+        self.assertEqual(self.filter(start_time__minute__lt="30"), {self.morning})
+        self.assertEqual(self.filter(end_time__month__lt="7"), {self.morning})
+        self.assertEqual(self.filter(end_time__day__gt="6"), {self.evening})
+
+    def test_date_parts_combine_with_year_and_range_filters(self):
+        self.assertEqual(self.filter(end_time__year__gt="2026", end_time__hour__gt="20"), {self.evening})
+        self.assertEqual(self.filter(start_time_range_before="2026-06-01", start_time__hour__gt="20"), set())
@@ -0,0 +1,43 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from auction.cache import auction_cache
+from auction.models import AuctionPhoto, Bid
+from tests.unit_tests.utils import create_running_auction, create_user
+
+
+class AuctionListQueryCountTest(TestCase):
+    """
+    The auction list reads authors, photos and leader bids from joined and prefetched rows, so its query count does not
+    grow with the page size.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        bidder = create_user("bidder")
+        for number in range(20):
+            auction = create_running_auction(author, title=f"Auction {number}")
+            AuctionPhoto.objects.create(auction=auction, photo=f"auction_photos/{number}.jpg")
+            bid = Bid.objects.create(auction=auction, author=bidder, price=20)
+            auction.leader_bid = bid
+            auction.current_price = bid.price
+            auction.bid_count = 1
+            auction.save()
+
+    def get_query_count(self, limit):
+        caches[auction_cache.alias].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/v1/auctions/?limit={limit}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), limit)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.assertEqual(self.get_query_count(2), self.get_query_count(20))
+
+    def test_query_count(self):
+        # Count, auctions with their authors and leader bids, photos
+        self.assertEqual(self.get_query_count(20), 3)
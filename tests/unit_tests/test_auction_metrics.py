@@ -0,0 +1,40 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+
+from auction.consumers import DROPPED_METRIC, GAPS_METRIC, SENT_METRIC, SUBSCRIBERS_METRIC, AuctionConsumer
+from charityAuctionProject.metrics import registry
+
+
+class AuctionMetricsTest(SimpleTestCase):
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def connect(self, auction_id):
+        consumer = AuctionConsumer()
+        consumer.auction_id = auction_id
+        consumer.auction_group_name = f"auction_{auction_id}"
+        consumer.channel_name = "channel"
+        consumer.channel_layer = mock.AsyncMock()
+        registry.increment(SUBSCRIBERS_METRIC, auction=auction_id)
+        for metric in (SENT_METRIC, DROPPED_METRIC, GAPS_METRIC):
+            registry.increment(metric, auction=auction_id)
+        return consumer
+
+    def test_counters_are_removed_with_the_last_connection(self):
+        first, second = self.connect(1), self.connect(1)
+        other = self.connect(2)
+
+        async_to_sync(first.disconnect)(1000)
+        self.assertEqual(registry.get(SENT_METRIC, auction=1), 2)
+
+        async_to_sync(second.disconnect)(1000)
+        rendered = registry.render()
+        self.assertNotIn('auction="1"', rendered)
+        self.assertEqual(registry.get(SENT_METRIC, auction=2), 1)
+        self.assertEqual(registry.get(SUBSCRIBERS_METRIC, auction=2), 1)
+
+        async_to_sync(other.disconnect)(1000)
+        self.assertNotIn('auction="2"', registry.render())
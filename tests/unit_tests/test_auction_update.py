@@ -0,0 +1,25 @@
+from django.test import TestCase
+
+from auction.models import Auction
+from auction.serializers import AuctionSerializer
+from tests.unit_tests.utils import create_running_auction, create_user
+
+
+class AuctionSerializerUpdateTest(TestCase):
+    def get_times(self, auction):
+        return {"start_time": auction.start_time, "end_time": auction.end_time}
+
+    def test_update_keeps_concurrent_bid_summary(self):
+        auction = create_running_auction(create_user("author"), started=False)
+        # A bid accepted after the instance was loaded
+        Auction.objects.filter(pk=auction.pk).update(started=True, current_price=50, bid_count=3)
+
+        serializer = AuctionSerializer(auction, data=self.get_times(auction) | {"title": "Edited"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.update(auction, serializer.validated_data)
+
+        auction.refresh_from_db()
+        self.assertEqual(auction.title, "Edited")
+        self.assertTrue(auction.started)
+        self.assertEqual(auction.current_price, 50)
+        self.assertEqual(auction.bid_count, 3)
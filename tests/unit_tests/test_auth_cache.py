@@ -0,0 +1,28 @@
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.service import AuthService
+from tests.unit_tests.utils import create_user
+
+
+class TokenUserCacheTest(TestCase):
+    def assertFreshUsers(self, auth_service, token, user):
+        first, _ = auth_service.authenticate_token(token)
+        first.username = "changed"
+        second, _ = auth_service.authenticate_token(token)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.pk, user.pk)
+        self.assertEqual(second.username, user.username)
+
+    def test_database_user_is_not_shared(self):
+        user = create_user("donor")
+        self.assertFreshUsers(AuthService(stateless_tokens=False), str(AccessToken.for_user(user)), user)
+
+    def test_stateless_user_is_not_shared(self):
+        user = create_user("donor")
+        auth_service = AuthService(stateless_tokens=True)
+        token = str(auth_service.add_user_claims(AccessToken.for_user(user), user))
+
+        with self.assertNumQueries(0):
+            self.assertFreshUsers(auth_service, token, user)
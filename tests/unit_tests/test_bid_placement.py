@@ -0,0 +1,104 @@
+import asyncio
+import random
+import threading
+from unittest import skipUnless
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.exceptions import APIException
+
+from auction.bid_book import bid_book
+from auction.models import Auction, Bid
+from auction.serializers import BidSerializer
+from auction.service import AsyncAuctionService, async_auction_service
+from tests.unit_tests.utils import create_running_auction, create_user
+
+BIDS = 200
+# Every thread holds a database connection, so they stay well below the default max_connections of PostgreSQL
+THREADS = 20
+
+
+class BidPlacementAssertions:
+    def assertSingleLeaderAndIncreasingPrices(self, auction):
+        bids = list(Bid.objects.filter(auction=auction).order_by("id"))
+        self.assertGreater(len(bids), 1)
+        prices = [bid.price for bid in bids]
+        self.assertEqual(prices, sorted(set(prices)), "Accepted prices have to strictly increase")
+        leaders = [bid for bid in bids if bid.leader]
+        self.assertEqual(len(leaders), 1)
+
+        auction.refresh_from_db()
+        self.assertEqual(leaders[0].id, auction.leader_bid_id)
+        self.assertEqual(leaders[0].price, auction.current_price)
+        self.assertEqual(len(bids), auction.bid_count)
+
+
+class ConcurrentBidTest(BidPlacementAssertions, TransactionTestCase):
+    """
+    Places many bids at once through the bid service. The database work runs on one thread here, so this checks
+    the validation and the bookkeeping of interleaved bids, the row lock is exercised by ConcurrentBidLockTest.
+    The bids are committed, as database_sync_to_async closes the connection of the test transaction.
+    """
+
+    def test_simultaneous_bids(self):
+        auction = create_running_auction(create_user("author"))
+        bidders = [create_user(f"bidder{number}") for number in range(10)]
+        bid_book.discard(auction.id)
+        prices = random.Random(0).sample(range(11, 11 + BIDS * 2), BIDS)
+
+        async def place_bids():
+            bids = [
+                async_auction_service.make_bid({"price": price}, bidders[number % len(bidders)], auction.id)
+                for number, price in enumerate(prices)
+            ]
+            return await asyncio.gather(*bids, return_exceptions=True)
+
+        # async_to_sync runs the database work on this thread, one bid after another
+        results = async_to_sync(place_bids)()
+
+        unexpected = [result for result in results if not isinstance(result, (Bid, APIException))]
+        self.assertEqual(unexpected, [])
+        self.assertSingleLeaderAndIncreasingPrices(auction)
+
+
+@skipUnless(connection.vendor == "postgresql", "Concurrent transactions need PostgreSQL row locks")
+class ConcurrentBidLockTest(BidPlacementAssertions, TransactionTestCase):
+    """
+    Places bids from many threads, each in its own transaction on its own connection.
+    """
+
+    def test_simultaneous_bids(self):
+        auction = create_running_auction(create_user("author"))
+        bidders = [create_user(f"bidder{number}") for number in range(10)]
+        # The undecorated place_bid, run on the calling thread
+        place_bid = AsyncAuctionService.__dict__["place_bid"].func
+        service = AsyncAuctionService()
+        prices = random.Random(0).sample(range(11, 11 + BIDS * 2), BIDS)
+        barrier = threading.Barrier(THREADS)
+        errors = []
+
+        def bid(number):
+            author = bidders[number % len(bidders)]
+            try:
+                barrier.wait()
+                for price in prices[number::THREADS]:
+                    serializer = BidSerializer(data={"price": price})
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        place_bid(service, serializer, author, auction.id)
+                    except APIException:
+                        pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=bid, args=(number,)) for number in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertSingleLeaderAndIncreasingPrices(Auction.objects.get(pk=auction.pk))
@@ -0,0 +1,41 @@
+import json
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from auction.consumers import AuctionConsumer
+from auction.replay import ReplayBuffer
+
+
+class ReplayBufferTest(SimpleTestCase):
+    def test_only_last_replayed_bid_is_leader(self):
+        buffer = ReplayBuffer(size=10)
+        previous_bid_id = None
+        for bid_id in (1, 2, 3):
+            buffer.append(1, previous_bid_id, {"id": bid_id, "price": bid_id * 10, "leader": True, "won": False})
+            previous_bid_id = bid_id
+
+        bids = buffer.since(1, 0, leader_bid_id=3)
+
+        self.assertEqual([bid["id"] for bid in bids], [1, 2, 3])
+        self.assertEqual([bid["leader"] for bid in bids], [False, False, True])
+        self.assertEqual([bid["leader"] for bid in buffer.since(1, 1, leader_bid_id=3)], [False, True])
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class ResumeParameterTest(TransactionTestCase):
+    def test_invalid_since_bid_id_is_a_parse_error(self):
+        async def connect():
+            communicator = WebsocketCommunicator(AuctionConsumer.as_asgi(), "/ws/auctions/1/bids?since_bid_id=abc")
+            communicator.scope["url_route"] = {"kwargs": {"auction_id": 1}}
+            connected, _ = await communicator.connect()
+            response = await communicator.receive_from()
+            await communicator.disconnect()
+            return connected, json.loads(response)
+
+        connected, response = async_to_sync(connect)()
+
+        self.assertTrue(connected)
+        self.assertEqual(response["status_code"], 400)
+        self.assertIn("since_bid_id", response["detail"])
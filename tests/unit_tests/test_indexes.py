@@ -0,0 +1,69 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from auction.filters import AuctionFilter
+from auction.models import Auction, Bid
+from tests.unit_tests.utils import create_running_auction, create_user
+
+
+class HotQueryIndexTest(TestCase):
+    """
+    Checks with EXPLAIN that the hot bid and auction queries are served by the indexes of migrations 0007, 0009 and
+    0015.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author = create_user("author")
+        cls.auction = create_running_auction(author)
+        for price in range(11, 21):
+            Bid.objects.create(auction=cls.auction, author=author, price=price, leader=price == 20)
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # The test tables are tiny, so the planner would prefer sequential scans
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, *index_names):
+        """
+        Asserts that the plan of the queryset uses one of the indexes.
+        """
+        plan = queryset.explain()
+        self.assertTrue(any(index_name in plan for index_name in index_names), plan)
+
+    def test_highest_bid_uses_price_index(self):
+        bids = Bid.objects.filter(auction_id=self.auction.id).order_by("-price")[:1]
+        self.assertUsesIndex(bids, "bid_auction_price_idx")
+
+    def test_bid_history_uses_created_index(self):
+        bids = Bid.objects.filter(auction_id=self.auction.id).order_by("-created", "-id")[:10]
+        self.assertUsesIndex(bids, "bid_auction_created_id_idx")
+
+    def test_leader_lookup_uses_partial_index(self):
+        # Without the default ordering by created, which would be served by the bid history index instead
+        bids = Bid.objects.filter(auction_id=self.auction.id, leader=True).order_by()
+        self.assertUsesIndex(bids, "bid_auction_leader_idx")
+
+    def test_winner_lookup_uses_partial_index(self):
+        bids = Bid.objects.filter(auction_id=self.auction.id, won=True).order_by()
+        self.assertUsesIndex(bids, "bid_auction_won_idx")
+
+    def test_due_auctions_use_scheduler_indexes(self):
+        now = timezone.now()
+        pending = Auction.objects.filter(started=False, finished=False, start_time__lte=now)
+        running = Auction.objects.filter(started=True, finished=False, end_time__lte=now)
+        # The planner may prefer the plain start_time and end_time indexes, both serve the range
+        self.assertUsesIndex(pending, "auction_start_due_idx", "auction_start_time_idx")
+        self.assertUsesIndex(running, "auction_end_due_idx", "auction_end_time_idx")
+
+    @skipUnless(connection.vendor == "postgresql", "The date part indexes are created on PostgreSQL only")
+    def test_date_part_filters_use_expression_indexes(self):
+        for field in ("start_time", "end_time"):
+            for part in ("month", "day", "hour", "minute"):
+                with self.subTest(field=field, part=part):
+                    auctions = AuctionFilter({f"{field}__{part}__gt": "1"}, queryset=Auction.objects.order_by()).qs
+                    self.assertUsesIndex(auctions, f"auction_{field}_{part}_idx")
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.unit_tests.utils import create_user
+
+METRICS_TOKEN = "scraper-token"
+
+
+@mock.patch("charityAuctionProject.metrics.METRICS_TOKEN", METRICS_TOKEN)
+class MetricsViewTest(TestCase):
+    def get_metrics(self, token=None):
+        client = APIClient()
+        if token is not None:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client.get(reverse("metrics"))
+
+    def test_anonymous_request_is_rejected(self):
+        self.assertEqual(self.get_metrics().status_code, 401)
+
+    def test_wrong_token_is_rejected(self):
+        self.assertEqual(self.get_metrics("wrong").status_code, 401)
+
+    def test_non_admin_user_is_rejected(self):
+        self.assertEqual(self.get_metrics(AccessToken.for_user(create_user("donor"))).status_code, 403)
+
+    def test_admin_user_gets_metrics(self):
+        admin = create_user("admin")
+        admin.is_staff = True
+        admin.save()
+
+        response = self.get_metrics(AccessToken.for_user(admin))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+
+    def test_metrics_token_gets_metrics(self):
+        self.assertEqual(self.get_metrics(METRICS_TOKEN).status_code, 200)
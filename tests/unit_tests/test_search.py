@@ -0,0 +1,40 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from auction.models import Auction
+from auction.search import search_auctions, search_index, search_postgresql
+from tests.unit_tests.utils import create_running_auction, create_user
+
+
+class AuctionSearchTest(TestCase):
+    def setUp(self):
+        search_index.clear()
+        self.addCleanup(search_index.clear)
+        author = create_user("author")
+        self.guitar = create_running_auction(author, title="Vintage guitar", description="Signed_by the band")
+        self.drums = create_running_auction(author, title="Drum kit", description="Played by the band on tour")
+
+    def search(self, text):
+        return set(search_auctions(Auction.objects.all(), text))
+
+    def test_words_match_as_prefixes(self):
+        self.assertEqual(self.search("vint guit"), {self.guitar})
+        self.assertEqual(self.search("band"), {self.guitar, self.drums})
+        self.assertEqual(self.search("signed"), {self.guitar})
+
+    def test_every_word_has_to_match(self):
+        self.assertEqual(self.search("band tour"), {self.drums})
+        self.assertEqual(self.search("guitar tour"), set())
+
+    def test_text_without_words_matches_nothing(self):
+        self.assertEqual(self.search("& | !"), set())
+
+    @skipUnless(connection.vendor == "postgresql", "The fallback index is compared with PostgreSQL text search")
+    def test_postgresql_matches_like_the_fallback_index(self):
+        # Texts without similar titles, which PostgreSQL matches by trigram similarity as well
+        for text in ("vint guit", "band", "signed", "band tour", "ban tou"):
+            with self.subTest(text=text):
+                expected = set(search_index.search(text))
+                self.assertEqual({auction.id for auction in search_postgresql(Auction.objects.all(), text)}, expected)
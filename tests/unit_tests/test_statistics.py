@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from auction.models import Auction, DonorStatistics
+from auction.scheduler.scheduler import finish_auctions, start_auctions
+from auction.serializers import BidSerializer
+from auction.service import AsyncAuctionService
+from auction.statistics import statistics_service
+from tests.unit_tests.utils import create_running_auction, create_user
+
+
+class CharityStatisticsTest(TestCase):
+    def place_bid(self, auction, author, price):
+        serializer = BidSerializer(data={"price": price})
+        serializer.is_valid(raise_exception=True)
+        # The undecorated place_bid, run on the calling thread
+        AsyncAuctionService.__dict__["place_bid"].func(AsyncAuctionService(), serializer, author, auction.id)
+
+    def create_started_auctions(self, author, count):
+        for _ in range(count):
+            create_running_auction(author, started=False)
+        start_auctions(timezone.now())
+        return list(Auction.objects.filter(started=True, finished=False))
+
+    def assertRunningTotals(self):
+        expected = Auction.objects.filter(started=True, finished=False).aggregate(
+            auction_count=Count("id"), bid_count=Sum("bid_count"), pledged_amount=Sum("current_price")
+        )
+        expected = {name: value or 0 for name, value in expected.items()}
+        self.assertEqual(statistics_service.get_charity_statistics()["running"], expected)
+
+    def test_donors_are_counted_once(self):
+        first, second = create_user("first"), create_user("second")
+        auction, other_auction = self.create_started_auctions(first, 2)
+
+        self.place_bid(auction, first, 11)
+        self.place_bid(auction, second, 12)
+        self.place_bid(other_auction, first, 11)
+        self.place_bid(auction, first, 13)
+
+        self.assertEqual(statistics_service.get_charity_statistics()["donor_count"], 2)
+
+    def test_deleted_donors_are_not_counted(self):
+        first, second = create_user("first"), create_user("second")
+        (auction,) = self.create_started_auctions(first, 1)
+        self.place_bid(auction, first, 11)
+        self.place_bid(auction, second, 12)
+
+        second.delete()
+
+        self.assertEqual(statistics_service.get_charity_statistics()["donor_count"], DonorStatistics.objects.count())
+        self.assertEqual(statistics_service.get_charity_statistics()["donor_count"], 1)
+
+    def test_running_totals_follow_the_auction_lifecycle(self):
+        first, second = create_user("first"), create_user("second")
+        auction, other_auction, last_auction = self.create_started_auctions(first, 3)
+        self.assertRunningTotals()
+
+        self.place_bid(auction, first, 11)
+        self.place_bid(auction, second, 15)
+        self.place_bid(other_auction, second, 20)
+        self.assertRunningTotals()
+        self.assertEqual(statistics_service.get_charity_statistics()["running"]["pledged_amount"], 35)
+
+        Auction.objects.filter(pk=auction.pk).update(end_time=timezone.now() - timedelta(minutes=1))
+        finish_auctions(timezone.now())
+        self.assertRunningTotals()
+
+        Auction.objects.get(pk=other_auction.pk).delete()
+        self.assertRunningTotals()
+        self.assertEqual(
+            statistics_service.get_charity_statistics()["running"],
+            {"auction_count": 1, "bid_count": 0, "pledged_amount": 0},
+        )
+
+    def test_statistics_are_read_from_the_charity_row(self):
+        author = create_user("author")
+        auctions = self.create_started_auctions(author, 3)
+        for number, auction in enumerate(auctions):
+            self.place_bid(auction, create_user(f"bidder{number}"), 11)
+
+        # The charity row, however many auctions and donors there are, the top donors are loaded when serialized
+        with self.assertNumQueries(1):
+            statistics_service.get_charity_statistics()
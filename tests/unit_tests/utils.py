@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from auction.models import Auction
+
+
+def create_user(username):
+    return User.objects.create_user(username, f"{username}@example.com", "password")
+
+
+def create_running_auction(author, **fields):
+    """
+    Creates an auction that is running for another day, so the lifecycle engine leaves it alone.
+    """
+    now = timezone.now()
+    defaults = {
+        "title": "Auction",
+        "description": "Description",
+        "initial_price": 10,
+        "min_bid_price_gap": 1,
+        "started": True,
+        "start_time": now - timedelta(hours=1),
+        "end_time": now + timedelta(days=1),
+    }
+    defaults.update(fields)
+    return Auction.objects.create(author=author, **defaults)